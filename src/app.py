@@ -4,11 +4,11 @@ Linear Agent - A Streamlit application for interacting with Linear via LangGraph
 NOTE: This file only contains the Streamlit UI implementation.
 For the LangGraph implementation, please see src/graph/graph.py
 """
-import asyncio
 import os
+import queue
 import sys
-import time
 from pathlib import Path
+from uuid import uuid4
 
 import streamlit as st
 
@@ -16,9 +16,10 @@ import streamlit as st
 parent_dir = Path(__file__).parent.parent
 sys.path.append(str(parent_dir))
 
-# Import the graph from graph.py
-from src.graph.graph import graph
+# Import the graph runner from streaming.py
+from src.graph.streaming import astream_reply
 from src.graph.utils.helpers import convert_messages_to_langchain_format
+from src.modules.resources.background import get_background_worker
 
 # Constants
 INITIAL_MESSAGE = "Hey there! I'm Lino, your project manager buddy. Ready to help with tasks, track issues, or just chat about the latest tech drama. What can I help you with today?"
@@ -113,6 +114,8 @@ def initialize_chat_history():
     """Initialize the chat history if it doesn't exist."""
     if "messages" not in st.session_state:
         st.session_state.messages = [{"role": "assistant", "content": INITIAL_MESSAGE}]
+    if "thread_id" not in st.session_state:
+        st.session_state.thread_id = str(uuid4())
 
 
 def display_chat_history():
@@ -122,42 +125,93 @@ def display_chat_history():
             st.markdown(message["content"])
 
 
-async def run_graph_async(messages):
+def render_task_cards(response):
     """
-    Run the LangGraph with the given messages.
-    
+    Render task cards for the tickets a response created, if any.
+
     Args:
-        messages (list): List of message dictionaries
-        
+        response (AIMessage): The final message of the graph run
+    """
+    params = getattr(response, 'params', None)
+    if not params:
+        return
+
+    # Check if we have params with task_name in the message object
+    if 'task_name' in params:
+        render_task_card(params['task_name'], params.get('description', ''), params.get('task_id', ''))
+
+    # Bulk creation returns one entry per created ticket
+    for task in params.get('tasks', []):
+        render_task_card(task['task_name'], task.get('description', ''), task.get('task_id', ''))
+
+
+async def stream_graph_async(messages, thread_id, events):
+    """
+    Run the LangGraph on the session's thread, publishing the reply as it is generated.
+
+    The partial reply so far is put on the events queue after every chunk, and
+    None is put on the queue when the run is over.
+
+    Args:
+        messages (list): The new message dictionaries; earlier turns come from the checkpoint
+        thread_id (str): The conversation's checkpoint thread
+        events (queue.Queue): Receives the partial reply text
+
+    Returns:
+        tuple: The final message and the node updates of the run
+    """
+    streamed = ""
+    response, updates = None, []
+
+    try:
+        async for event in astream_reply(convert_messages_to_langchain_format(messages), thread_id):
+            if event["type"] == "delta":
+                streamed += event["text"]
+                events.put(streamed)
+            elif event["type"] == "reset":
+                streamed = ""
+            elif event["type"] == "message":
+                response, updates = event["message"], event["updates"]
+    finally:
+        events.put(None)
+
+    return response, updates
+
+
+def run_graph(messages, thread_id, message_placeholder):
+    """
+    Run the graph on the shared background loop and render the reply as it streams in.
+
+    Streamlit elements can only be updated from the script thread, so the
+    graph publishes partial replies through a queue that this thread drains.
+
+    Args:
+        messages (list): The new message dictionaries
+        thread_id (str): The conversation's checkpoint thread
+        message_placeholder: Streamlit placeholder the reply is written into
+
     Returns:
         str: The response content
     """
     try:
-        # Run the graph
-        result = await graph.ainvoke({"messages": convert_messages_to_langchain_format(messages)})
-        
+        events = queue.Queue()
+        future = get_background_worker().spawn(stream_graph_async(messages, thread_id, events))
+        while (text := events.get()) is not None:
+            message_placeholder.markdown(text + "▌")
+        response, updates = future.result()
+
         # Debug output - only in development mode
         if os.getenv("DEBUG", "false").lower() == "true":
             with st.expander("Debug Information"):
-                st.code(result, language="python")
-        
-        # Get the response message
-        response = result.get("messages", None)
-        
-        # Check if we have params with task_name in the message object
-        if response and hasattr(response, 'params') and response.params and 'task_name' in response.params:
-            task_name = response.params['task_name']
-            description = response.params.get('description', '')
-            task_id = response.params.get('task_id', '')
-            
-            # Create a fancy task card
-            render_task_card(task_name, description, task_id)
-        
+                st.code(updates, language="python")
+
+        render_task_cards(response)
+
         if response and hasattr(response, 'content') and response.content:
             response_content = response.content
         else:
             response_content = "No response from the graph."
-        
+
         return response_content
     except Exception as e:
         st.error(f"Error executing graph: {str(e)}")
@@ -184,19 +238,9 @@ def process_user_input(prompt):
         message_placeholder = st.empty()
         message_placeholder.markdown("▌")
         
-        # Run the async function
         try:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            response = loop.run_until_complete(run_graph_async(st.session_state.messages))
-            loop.close()
-            
-            # Display the response with a typing effect
-            full_response = ""
-            for chunk in response.split():
-                full_response += chunk + " "
-                time.sleep(0.01)  # Faster typing effect
-                message_placeholder.markdown(full_response + "▌")
+            # Only the new message is sent; the checkpointer holds the rest of the conversation
+            response = run_graph([{"role": "user", "content": prompt}], st.session_state.thread_id, message_placeholder)
             
             message_placeholder.markdown(response)
             
@@ -207,6 +251,15 @@ def process_user_input(prompt):
             message_placeholder.markdown("Sorry, I encountered an error. Please try again.")
 
 
+def render_background_status():
+    """Show background work (like memory extraction) that is still running."""
+    stats = get_background_worker().stats()
+    with st.sidebar:
+        st.caption(f"Background jobs: {stats['pending']} pending, {stats['completed']} done, {stats['failed']} failed")
+        for job in get_background_worker().pending():
+            st.caption(f"• {job['name']} ({job['age']}s)")
+
+
 def render_footer():
     """Render the application footer."""
     st.divider()
@@ -231,6 +284,7 @@ def main():
     
     # Render footer
     render_footer()
+    render_background_status()
 
 
 if __name__ == "__main__":
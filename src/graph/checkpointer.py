@@ -0,0 +1,61 @@
+import asyncio
+import os
+import threading
+import weakref
+import aiosqlite
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+from src.modules.resources.resources import get_registry
+
+
+class CheckpointStore:
+    """
+    SQLite-backed LangGraph checkpointers, one per event loop.
+
+    AsyncSqliteSaver binds to the loop it is created on, so, like the Linear
+    transport, a saver is kept per running loop. They all write to the same
+    database file, so any loop or process can pick up any thread.
+    """
+
+    def __init__(self, path: str | None = None):
+        self.path = path or os.getenv("CHECKPOINT_DB", "checkpoints.sqlite")
+        self._savers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncSqliteSaver]" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def get(self) -> AsyncSqliteSaver:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            saver = self._savers.get(loop)
+            if saver is None:
+                connection = aiosqlite.connect(self.path)
+                # aiosqlite's worker thread isn't a daemon, and the interpreter joins those before
+                # atexit runs, so the registry would never get to close it
+                thread = getattr(connection, "_thread", None)
+                if thread is not None:
+                    thread.daemon = True
+                saver = AsyncSqliteSaver(connection)
+                self._savers[loop] = saver
+        return saver
+
+    def close(self):
+        with self._lock:
+            savers = list(self._savers.items())
+            self._savers.clear()
+
+        try:
+            current_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            current_loop = None
+
+        for loop, saver in savers:
+            if loop.is_closed():
+                continue
+            if loop is current_loop:
+                current_loop.create_task(saver.conn.close())
+            elif loop.is_running():
+                asyncio.run_coroutine_threadsafe(saver.conn.close(), loop).result()
+            else:
+                loop.run_until_complete(saver.conn.close())
+
+
+def get_checkpoint_store() -> CheckpointStore:
+    return get_registry().get("checkpoint_store", CheckpointStore, close=lambda store: store.close())
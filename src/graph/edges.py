@@ -1,7 +1,13 @@
+import os
+from langchain_core.messages.utils import count_tokens_approximately
 from src.graph.state import State
+
+# Approximate tokens of message history kept verbatim; older turns are folded into the summary
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", 3000))
+
 def select_route(state: State):
     if state['next_node'] == 'fallback':
-        return 'fallback_node'
+        return 'memory_injection_node'
     elif state['next_node'] == 'create_task':   
         return 'create_task_node'
     elif state['next_node'] == 'get_current_issues':
@@ -9,5 +15,7 @@ def select_route(state: State):
     elif state['next_node'] == 'get_user_issues':
         return 'get_user_issues_node'
     else:
-        return 'fallback_node'
+        return 'memory_injection_node'
 
+def should_summarize(state: State) -> bool:
+    return count_tokens_approximately(state['messages']) > HISTORY_TOKEN_BUDGET
@@ -1,28 +1,37 @@
+import weakref
 from src.graph.state import State
 from langgraph.graph import StateGraph, START, END
-from src.graph.nodes import router_node, fallback_node, memory_injection_node, create_task_node, get_current_issues, memory_update_node, get_user_issues_node
-from src.graph.edges import select_route
-import asyncio
+from src.graph.nodes import router_node, fallback_node, memory_injection_node, create_task_node, get_current_issues, memory_update_node, get_user_issues_node, summarize_conversation_node
+from src.graph.edges import select_route, should_summarize
+from src.graph.checkpointer import get_checkpoint_store
+from src.modules.resources.tracing import get_tracer, traced
 
 
-def create_graph():
+def create_graph(checkpointed: bool = False):
     graph_builder = StateGraph(State)
 
-    graph_builder.add_node("memory_update_node", memory_update_node)
-    graph_builder.add_node("memory_injection_node", memory_injection_node)
-    graph_builder.add_node("router_node", router_node)
-    graph_builder.add_node("fallback_node", fallback_node)
-    graph_builder.add_node("create_task_node", create_task_node)
-    graph_builder.add_node("get_current_issues_node", get_current_issues)
-    graph_builder.add_node("get_user_issues_node", get_user_issues_node)
-
+    nodes = {
+        "memory_update_node": memory_update_node,
+        "memory_injection_node": memory_injection_node,
+        "router_node": router_node,
+        "fallback_node": fallback_node,
+        "create_task_node": create_task_node,
+        "get_current_issues_node": get_current_issues,
+        "get_user_issues_node": get_user_issues_node,
+    }
+    if checkpointed:
+        # Only a checkpoint keeps the summary. No edge leads here: the node is registered only so
+        # asummarize_thread can write its update with aupdate_state(as_node=...) after the reply
+        nodes["summarize_conversation_node"] = summarize_conversation_node
+    for name, node in nodes.items():
+        # Every node runs in a span, so each one's latency shows up separately
+        graph_builder.add_node(name, traced(f"node.{name}", node))
 
     graph_builder.add_edge(START, "memory_update_node")
-    graph_builder.add_edge("memory_update_node", "memory_injection_node")
-    graph_builder.add_edge("memory_injection_node", "router_node")
+    graph_builder.add_edge("memory_update_node", "router_node")
 
     valid_destinations = {
-        "fallback_node": "fallback_node",
+        "memory_injection_node": "memory_injection_node",
         "create_task_node": "create_task_node",
         "get_current_issues_node": "get_current_issues_node",
         "get_user_issues_node": "get_user_issues_node"
@@ -33,12 +42,59 @@ def create_graph():
         select_route,
         valid_destinations
     )
+    graph_builder.add_edge("memory_injection_node", "fallback_node")
     
     conversation_nodes = ["fallback_node", "create_task_node", "get_current_issues_node", "get_user_issues_node"]
 
     for conversation_node in conversation_nodes:
         graph_builder.add_edge(conversation_node, END)
+    if checkpointed:
+        graph_builder.add_edge("summarize_conversation_node", END)
 
     return graph_builder
 
 graph = create_graph().compile()
+
+_checkpointed_graphs: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+_summarizing: set[str] = set()
+
+
+def get_checkpointed_graph():
+    """The graph compiled with the SQLite checkpointer of the running event loop."""
+    checkpointer = get_checkpoint_store().get()
+    compiled = _checkpointed_graphs.get(checkpointer)
+    if compiled is None:
+        compiled = create_graph(checkpointed=True).compile(checkpointer=checkpointer)
+        _checkpointed_graphs[checkpointer] = compiled
+    return compiled
+
+
+async def asummarize_thread(thread_id: str):
+    """
+    Fold a checkpointed thread's older turns into its summary once its history
+    passes the token budget. At most one runs per thread, and the summary is
+    dropped if another turn was checkpointed while it was being written, since
+    writing it then would overwrite that turn.
+    """
+    if thread_id in _summarizing:
+        return
+    _summarizing.add(thread_id)
+    try:
+        compiled = get_checkpointed_graph()
+        config = {"configurable": {"thread_id": thread_id}}
+        snapshot = await compiled.aget_state(config)
+        if not snapshot.values or not should_summarize(snapshot.values):
+            return
+        with get_tracer().span("summarize_thread", thread_id=thread_id) as span:
+            update = await summarize_conversation_node(snapshot.values)
+            if not update:
+                return
+            latest = await compiled.aget_state(config)
+            if latest.config["configurable"]["checkpoint_id"] != snapshot.config["configurable"]["checkpoint_id"]:
+                # The next turn's own summarize job picks the thread up again
+                span.add_event("summary_stale")
+                get_tracer().count("summary_stale")
+                return
+            await compiled.aupdate_state(config, update, as_node="summarize_conversation_node")
+    finally:
+        _summarizing.discard(thread_id)
@@ -1,89 +1,244 @@
-from langchain_core.messages import AIMessage
-from src.graph.utils.chains import get_fallback_chain, get_router_chain, create_function_chain
+from langchain_core.messages import AIMessage, RemoveMessage
+from langchain_core.messages.utils import count_tokens_approximately
+from src.graph.utils.chains import get_fallback_chain, get_router_chain, get_fused_router_chain, get_summary_chain, create_function_chain, ROUTER_MODE
 from src.graph.state import State
+from src.graph.edges import HISTORY_TOKEN_BUDGET
 from src.modules.memory.memory_service import get_memory_manager
-import asyncio
+from src.modules.resources.background import get_background_worker
+from src.modules.resources.tracing import get_tracer
+from uuid import uuid4
 from src.graph.utils.prompts import FUNCTION_DEFINITIONS, CREATE_TASK_PROMPT, GET_CURRENT_ISSUES_PROMPT, GET_USER_ISSUES_PROMPT
 from src.modules.linear.linear import get_linear_client, Ticket, Assignee
-from src.graph.utils.helpers import error_handler, retry_async
-from src.graph.utils.structured_outputs import CreateTaskResponse, GetCurrentIssuesResponse, GetUserIssuesResponse
+from src.modules.linear.linear_queries import LISTING_FIELDS
+from src.graph.utils.helpers import error_handler, stream_reset, stream_text
+from src.graph.utils.retry import retry_step, new_deadline
+from src.graph.utils.intent_classifier import get_intent_classifier
+from src.graph.utils.semantic_cache import context_key, get_extraction_cache
+from src.graph.utils.context import get_context_window
+from src.graph.utils.structured_outputs import CreateTasksResponse, GetCurrentIssuesResponse, GetUserIssuesResponse
+
+def _conversation(state: State, chain: str):
+    # Each chain sees only as much of the conversation as its budget allows, after the summary
+    return get_context_window().select(chain, state['messages'], state.get('summary'))
 
 async def memory_update_node(state: State):
     last_message = state['messages'][-1]
     if last_message.type == "human":
         memory_manager = get_memory_manager()
-        asyncio.create_task(memory_manager.extract_and_save_memory(last_message.content))
+        # Tracked so it outlives the turn and is drained on shutdown instead of being dropped
+        get_background_worker().submit(memory_manager.extract_and_save_memory(last_message.content, state.get('user_id')), name="extract_memory")
 
-    return {}
+    # Every I/O step of this turn shares one deadline
+    return {"deadline": new_deadline()}
 
 async def memory_injection_node(state: State):
     memory_manager = get_memory_manager()
-    memory_context = await memory_manager.get_relevant_memories(state['messages'][-1].content)
+    memory_context = await memory_manager.get_relevant_memories(state['messages'][-1].content, state.get('user_id'))
 
     return {
         "memory_context": memory_context
     }
 
-@retry_async(max_retries=3, delay=2, backoff=2, exceptions=(Exception,))
 async def router_node(state: State):
-    chain = get_router_chain()
-    response = await chain.ainvoke({
-        "messages": state['messages'],
-        "function_definitions": FUNCTION_DEFINITIONS
-    })
+    # Retrieval overlaps with the router call; it's only awaited on the fallback branch
+    memory_manager = get_memory_manager()
+    message = state['messages'][-1].content
+    memory_manager.prefetch_relevant_memories(message, state.get('user_id'))
+
+    prediction = None
+    intent_classifier = get_intent_classifier()
+    if intent_classifier is not None and state['messages'][-1].type == "human":
+        prediction = await intent_classifier.aclassify(message)
+
+    if prediction is not None:
+        next_node = prediction.next_node
+        route_payload = None
+    elif ROUTER_MODE == "fused":
+        chain = get_fused_router_chain()
+        response = await retry_step("llm", lambda: chain.ainvoke({
+            "messages": _conversation(state, "extraction"),
+            "function_definitions": FUNCTION_DEFINITIONS
+        }), state.get('deadline'))
+        next_node = response.route.next_node
+        route_payload = getattr(response.route, "payload", None)
+    else:
+        chain = get_router_chain()
+        response = await retry_step("llm", lambda: chain.ainvoke({
+            "messages": _conversation(state, "router"),
+            "function_definitions": FUNCTION_DEFINITIONS
+        }), state.get('deadline'))
+        next_node = response.next_node
+        route_payload = None
+
+    if next_node != "fallback":
+        memory_manager.cancel_prefetch(message, state.get('user_id'))
+
+    return {"next_node": next_node, "route_payload": route_payload}
 
-    return {"next_node": response.next_node}
+async def _extract_arguments(state: State, prompt_template, output_model, cache_route: str | None = None):
+    # In fused router mode the arguments were already extracted alongside the route
+    route_payload = state.get('route_payload')
+    if isinstance(route_payload, output_model):
+        return route_payload
+
+    message = state['messages'][-1].content
+    conversation = _conversation(state, "extraction")
+    # Extraction reads the whole window, so the earlier turns in it are part of the key
+    context = context_key(conversation[:-1])
+    extraction_cache = get_extraction_cache() if cache_route else None
+    vector = None
+    if extraction_cache is not None:
+        cached, vector = await extraction_cache.alookup(cache_route, message, context)
+        if cached is not None:
+            return cached
+
+    chain = create_function_chain(prompt_template, output_model)
+    response = await retry_step("llm", lambda: chain.ainvoke({"messages": conversation}), state.get('deadline'))
+
+    if extraction_cache is not None:
+        extraction_cache.set(cache_route, message, response, vector, context)
+    return response
 
 @error_handler(error_message="Something went wrong. Please try again.")
-@retry_async(max_retries=3, delay=2, backoff=2, exceptions=(Exception,))
 async def fallback_node(state: State):
     chain = get_fallback_chain()
-    response = await chain.ainvoke({
-        "messages": state['messages'], 
+    response = await retry_step("llm", lambda: chain.ainvoke({
+        "messages": _conversation(state, "fallback"),
         "memory_context": state['memory_context'],
         "function_definitions": FUNCTION_DEFINITIONS
-    })
+    }), state.get('deadline'))
 
     return {"messages": AIMessage(content=response.content)}
 
 @error_handler(error_message="Error creating ticket")
-@retry_async(max_retries=3, delay=2, backoff=2, exceptions=(Exception,))
 async def create_task_node(state: State):
-    chain = create_function_chain(CREATE_TASK_PROMPT, CreateTaskResponse)
-    response = await chain.ainvoke({"messages": state['messages']})
+    response = await _extract_arguments(state, CREATE_TASK_PROMPT, CreateTasksResponse)
+    if not response.tasks:
+        # Nothing to create; don't look up the team or claim tickets were made
+        return {"messages": AIMessage(content="I couldn't find a task to create in your message. What should the ticket be about?")}
 
     linear_client = get_linear_client()
-    ticket = linear_client.create_team_ticket(Ticket(
-        title=response.task_name, 
-        description=response.description, 
-        assignee=Assignee(email=response.assignee_email)
-    ))
-    
-    return {"messages": AIMessage(content=response.message, params={
-        "task_name": ticket.title, 
-        "description": ticket.description, 
-        "task_id": ticket.id,
-        "assignee_email": ticket.assignee.email if ticket.assignee else None
+    tickets = [
+        Ticket(
+            # Issue ids are picked once per run, before any retry, so a retried create can't make a duplicate
+            id=str(uuid4()),
+            title=task.task_name,
+            description=task.description,
+            assignee=Assignee(email=task.assignee_email) if task.assignee_email else None
+        )
+        for task in response.tasks
+    ]
+
+    if len(tickets) == 1:
+        ticket = await retry_step("linear_mutation", lambda: linear_client.acreate_team_ticket(tickets[0]), state.get('deadline'))
+        # The confirmation only goes out once Linear has actually created the ticket
+        stream_text(response.message)
+
+        return {"messages": AIMessage(content=response.message, params={
+            "task_name": ticket.title, 
+            "description": ticket.description, 
+            "task_id": ticket.id,
+            "assignee_email": ticket.assignee.email if ticket.assignee else None
+        })}
+
+    results = await retry_step("linear_mutation", lambda: linear_client.acreate_team_tickets(tickets), state.get('deadline'))
+    created = [result.ticket for result in results if result.success]
+    failed = [f"- {tickets[result.index].title}: {result.error}" for result in results if not result.success]
+
+    if not created:
+        content = "None of the tickets could be created:\n" + "\n".join(failed)
+    elif failed:
+        content = response.message + f"\n\nCreated {len(created)} of {len(tickets)} tickets. These failed:\n" + "\n".join(failed)
+    else:
+        content = response.message
+    stream_text(content)
+
+    return {"messages": AIMessage(content=content, params={
+        "tasks": [
+            {
+                "task_name": ticket.title,
+                "description": ticket.description,
+                "task_id": ticket.id,
+                "assignee_email": ticket.assignee.email if ticket.assignee else None
+            }
+            for ticket in created
+        ]
     })}
 
+async def _alist_tickets(state: State, message: str, stream_pages) -> AIMessage:
+    """Stream a ticket listing page by page, so the first page shows while later ones load."""
+    linear_client = get_linear_client()
+    tickets = []
+    truncated = False
+    attempts = 0
+
+    async def afetch():
+        nonlocal truncated, attempts
+        if attempts:
+            # A retry lists from the start again; drop what the failed attempt streamed
+            stream_reset()
+            tickets.clear()
+            truncated = False
+        attempts += 1
+        # The reply's opening line is known before Linear answers, so show it right away
+        stream_text(message + "\n\n")
+        async for page in stream_pages():
+            shown = page[:max(linear_client.max_items - len(tickets), 0)]
+            truncated = truncated or len(shown) < len(page)
+            if shown:
+                stream_text(("\n" if tickets else "") + linear_client.format_tickets(shown, start=len(tickets)))
+                tickets.extend(shown)
+
+    await retry_step("linear_query", afetch, state.get('deadline'))
+
+    content = message + "\n\n" + linear_client.format_tickets(tickets)
+    if truncated:
+        note = f"\n\nShowing the first {len(tickets)} issues; there are more in Linear."
+        stream_text(note)
+        content += note
+    return AIMessage(content=content)
+
 @error_handler(error_message="Error getting current issues")
-@retry_async(max_retries=3, delay=2, backoff=2, exceptions=(Exception,))
 async def get_current_issues(state: State):
-    chain = create_function_chain(GET_CURRENT_ISSUES_PROMPT, GetCurrentIssuesResponse)
-    response = await chain.ainvoke({"messages": state['messages']})
+    response = await _extract_arguments(state, GET_CURRENT_ISSUES_PROMPT, GetCurrentIssuesResponse, cache_route="get_current_issues")
 
     linear_client = get_linear_client()
-    tickets = linear_client.get_team_tickets(response.status)
-    
-    return {"messages": AIMessage(content=response.message + "\n\n" + linear_client.format_tickets(tickets))}
+    return {"messages": await _alist_tickets(
+        state, response.message, lambda: linear_client.astream_team_tickets(response.status, fields=LISTING_FIELDS)
+    )}
 
 @error_handler(error_message="Error getting user issues")
-@retry_async(max_retries=3, delay=2, backoff=2, exceptions=(Exception,))
 async def get_user_issues_node(state: State):
-    chain = create_function_chain(GET_USER_ISSUES_PROMPT, GetUserIssuesResponse)
-    response = await chain.ainvoke({"messages": state['messages']})
-    
+    response = await _extract_arguments(state, GET_USER_ISSUES_PROMPT, GetUserIssuesResponse, cache_route="get_user_issues")
+
     linear_client = get_linear_client()
-    tickets = linear_client.get_user_issues(response.email)
-    
-    return {"messages": AIMessage(content=response.message + "\n\n" + linear_client.format_tickets(tickets))}
+    return {"messages": await _alist_tickets(
+        state, response.message, lambda: linear_client.astream_user_issues(response.email, fields=LISTING_FIELDS)
+    )}
+
+async def summarize_conversation_node(state: State):
+    messages = state['messages']
+    # Keep the most recent messages within half the budget verbatim, but always the last exchange
+    keep = 2
+    while keep < len(messages) and count_tokens_approximately(messages[-(keep + 1):]) <= HISTORY_TOKEN_BUDGET // 2:
+        keep += 1
+    trimmed = messages[:-keep]
+    if not trimmed:
+        return {}
+
+    chain = get_summary_chain()
+    try:
+        # Runs after the reply has been produced, so it isn't bound by the turn deadline
+        response = await retry_step("llm", lambda: chain.ainvoke({
+            "messages": trimmed,
+            "summary": state.get('summary') or "None yet"
+        }))
+    except Exception as e:
+        get_tracer().event("summary_failed", error=f"{type(e).__name__}: {e}")
+        get_tracer().count("summary_failures")
+        return {}
+
+    return {
+        "summary": response.content,
+        "messages": [RemoveMessage(id=message.id) for message in trimmed]
+    }
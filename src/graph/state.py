@@ -1,11 +1,17 @@
-from langgraph.graph import StateGraph
+from langgraph.graph.message import add_messages
 from langchain_core.messages import BaseMessage
-from typing import List
+from typing import Annotated, List
 from typing import TypedDict
 from src.graph.utils.chains import RouterResponseLiteral
+from src.graph.utils.structured_outputs import CreateTasksResponse, GetCurrentIssuesResponse, GetUserIssuesResponse
 
 class State(TypedDict):
-    messages: List[BaseMessage]
+    # Appended to rather than replaced, so a checkpointed thread only needs the new message each turn
+    messages: Annotated[List[BaseMessage], add_messages]
     summary: str
     next_node: RouterResponseLiteral | None
     memory_context: str
+    # Memory namespace: whose memories are read and written; unset uses the shared default
+    user_id: str | None
+    deadline: float
+    route_payload: CreateTasksResponse | GetCurrentIssuesResponse | GetUserIssuesResponse | None
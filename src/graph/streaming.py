@@ -0,0 +1,66 @@
+from typing import AsyncIterator
+from langchain_core.messages import AIMessage, BaseMessage
+from src.graph.graph import graph, get_checkpointed_graph, asummarize_thread
+from src.graph.utils.chains import USER_FACING_TAG
+from src.modules.resources.background import get_background_worker
+from src.modules.resources.tracing import get_tracer
+
+
+async def astream_reply(messages: list[BaseMessage], thread_id: str | None = None, user_id: str | None = None) -> AsyncIterator[dict]:
+    """
+    Run the graph for one turn and yield the reply as it is generated.
+
+    With a thread_id the conversation is checkpointed, so messages only needs
+    the new message; without one, messages must be the whole history.
+    user_id picks the memory namespace; a checkpointed thread remembers it.
+
+    Yields {"type": "delta", "text"} for LLM tokens from user-facing chains and
+    for text action nodes send ahead of their Linear calls, {"type": "reset"}
+    when a retried LLM call restarts the reply or a node fails after streaming
+    part of it, and finally
+    {"type": "message", "message", "updates"} with the node's final message.
+    """
+    streamed_id = None
+    response = None
+    updates = []
+
+    if thread_id:
+        runner, config = get_checkpointed_graph(), {"configurable": {"thread_id": thread_id}}
+    else:
+        runner, config = graph, None
+
+    graph_input = {"messages": messages}
+    if user_id:
+        graph_input["user_id"] = user_id
+
+    # The root span of the turn; node, LLM, Linear and memory spans nest under it
+    with get_tracer().span("turn", thread_id=thread_id, checkpointed=thread_id is not None) as span:
+        async for mode, chunk in runner.astream(graph_input, config, stream_mode=["messages", "custom", "updates"]):
+            if mode == "messages":
+                token, metadata = chunk
+                if USER_FACING_TAG not in metadata.get("tags", []) or not isinstance(token.content, str):
+                    continue
+                # A retried LLM call starts a new message; drop the partial one
+                if token.id != streamed_id:
+                    if streamed_id is not None:
+                        yield {"type": "reset"}
+                    streamed_id = token.id
+                if "first_token_ms" not in span.attributes:
+                    span.set(first_token_ms=round(span.duration * 1000, 1))
+                yield {"type": "delta", "text": token.content}
+            elif mode == "custom" and "text" in chunk:
+                yield {"type": "delta", "text": chunk["text"]}
+            elif mode == "custom" and chunk.get("reset"):
+                yield {"type": "reset"}
+            elif mode == "updates":
+                updates.append(chunk)
+                for node, update in chunk.items():
+                    if update and isinstance(update.get("messages"), AIMessage):
+                        response = update["messages"]
+                        span.set(node=node, response_chars=len(response.content or ""))
+
+    if thread_id:
+        # Older turns are folded into the summary after the reply, off the response path
+        get_background_worker().submit(asummarize_thread(thread_id), name="summarize_conversation")
+
+    yield {"type": "message", "message": response, "updates": updates}
@@ -1,9 +1,18 @@
-from langchain_core.messages import BaseMessage
+import os
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-from typing import List, Literal
-from src.graph.utils.prompts import FALLBACK_PROMPT, ROUTER_PROMPT
+from typing import Literal
+from src.graph.utils.prompts import FALLBACK_PROMPT, ROUTER_PROMPT, FUSED_ROUTER_PROMPT, SUMMARY_PROMPT
+from src.graph.utils.structured_outputs import FusedRouterResponse
 from langchain_google_genai import ChatGoogleGenerativeAI
 from pydantic import BaseModel, Field
+from src.modules.resources.resources import get_registry
+from src.modules.resources.tracing import get_tracer
+
+# "split" routes first and extracts arguments in the action node, "fused" does both in one call
+ROUTER_MODE = os.getenv("ROUTER_MODE", "split")
+
+# Tokens from runs carrying this tag are streamed to the user; structured-output calls never carry it
+USER_FACING_TAG = "user_facing"
 
 RouterResponseLiteral = Literal["fallback", "create_task", "get_current_issues", "get_user_issues"]
 
@@ -12,28 +21,73 @@ class RouterResponse(BaseModel):
         description="The next node to go to. It must be one of: 'fallback', 'create_task', 'get_current_issues', 'get_user_issues'"
     )
 
-def get_router_chain():
+def get_llm() -> ChatGoogleGenerativeAI:
+    return get_registry().get(
+        "llm", lambda: ChatGoogleGenerativeAI(model="gemini-2.0-flash", callbacks=[get_tracer().callback_handler])
+    )
+
+
+def _build_router_chain():
     prompt = ChatPromptTemplate.from_messages([
         ("system", ROUTER_PROMPT),
         MessagesPlaceholder(variable_name="messages")
     ])
-    llm = ChatGoogleGenerativeAI(model="gemini-2.0-flash").with_structured_output(RouterResponse)
+    llm = get_llm().with_structured_output(RouterResponse)
     return prompt | llm
 
 
-def get_fallback_chain():
+def get_router_chain():
+    return get_registry().get("router_chain", _build_router_chain)
+
+
+def _build_fused_router_chain():
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", FUSED_ROUTER_PROMPT),
+        MessagesPlaceholder(variable_name="messages")
+    ])
+    llm = get_llm().with_structured_output(FusedRouterResponse)
+    return prompt | llm
+
+
+def get_fused_router_chain():
+    return get_registry().get("fused_router_chain", _build_fused_router_chain)
+
+
+def _build_fallback_chain():
     system_message = FALLBACK_PROMPT
     prompt = ChatPromptTemplate.from_messages([
         ("system", system_message),
         MessagesPlaceholder(variable_name="messages")
     ])
-    llm = ChatGoogleGenerativeAI(model="gemini-2.0-flash")
+    llm = get_llm().with_config(tags=[USER_FACING_TAG])
     return prompt | llm
 
-def create_function_chain(prompt_template, output_model):
-    llm = ChatGoogleGenerativeAI(model="gemini-2.0-flash")
+
+def get_fallback_chain():
+    return get_registry().get("fallback_chain", _build_fallback_chain)
+
+
+def _build_summary_chain():
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", SUMMARY_PROMPT),
+        MessagesPlaceholder(variable_name="messages")
+    ])
+    return prompt | get_llm()
+
+
+def get_summary_chain():
+    return get_registry().get("summary_chain", _build_summary_chain)
+
+
+def _build_function_chain(prompt_template, output_model):
+    llm = get_llm()
     prompt = ChatPromptTemplate.from_messages([
         ("system", prompt_template),
         MessagesPlaceholder(variable_name="messages")
     ])
     return prompt | llm.with_structured_output(output_model)
+
+
+def create_function_chain(prompt_template, output_model):
+    name = f"function_chain:{output_model.__module__}.{output_model.__qualname__}:{hash(prompt_template)}"
+    return get_registry().get(name, lambda: _build_function_chain(prompt_template, output_model))
@@ -0,0 +1,106 @@
+import os
+import threading
+from typing import Literal
+from langchain_core.messages import BaseMessage, SystemMessage
+from langchain_core.messages.utils import count_tokens_approximately, trim_messages
+from pydantic import BaseModel
+from src.modules.resources.resources import get_registry
+
+
+class ContextBudget(BaseModel):
+    max_tokens: int
+    max_messages: int
+    # "last" drops the oldest messages; "truncate" first shortens long older messages so more turns fit
+    strategy: Literal["last", "truncate"] = "last"
+    max_message_tokens: int = 300
+
+
+# The router and extraction chains only need the latest request and a little context;
+# the fallback chain holds the actual conversation
+DEFAULT_CONTEXT_BUDGETS: dict[str, ContextBudget] = {
+    "router": ContextBudget(max_tokens=1000, max_messages=6),
+    "extraction": ContextBudget(max_tokens=1500, max_messages=6),
+    "fallback": ContextBudget(max_tokens=4000, max_messages=30),
+}
+
+
+def _truncate(message: BaseMessage, max_tokens: int) -> BaseMessage:
+    # count_tokens_approximately assumes ~4 characters per token
+    max_chars = max_tokens * 4
+    if not isinstance(message.content, str) or len(message.content) <= max_chars:
+        return message
+    return message.model_copy(update={"content": message.content[:max_chars] + " [...]"})
+
+
+class ContextWindow:
+    """
+    Picks the part of the conversation each chain gets to see, within a
+    per-chain message count and approximate token budget. The conversation
+    summary, when there is one, is always kept ahead of the selected turns.
+    """
+
+    def __init__(self, budgets: dict[str, ContextBudget] | None = None):
+        self.budgets = {**DEFAULT_CONTEXT_BUDGETS, **(budgets or {})}
+        self.tokens_in: dict[str, int] = {chain: 0 for chain in self.budgets}
+        self.tokens_out: dict[str, int] = {chain: 0 for chain in self.budgets}
+        self._lock = threading.Lock()
+
+    def select(self, chain: str, messages: list[BaseMessage], summary: str | None = None) -> list[BaseMessage]:
+        budget = self.budgets[chain]
+        selected = messages[-budget.max_messages:]
+        if budget.strategy == "truncate":
+            selected = [_truncate(message, budget.max_message_tokens) for message in selected[:-1]] + selected[-1:]
+
+        system = [SystemMessage(content=f"Summary of the earlier conversation:\n{summary}")] if summary else []
+        trimmed = trim_messages(
+            system + selected,
+            max_tokens=budget.max_tokens,
+            token_counter=count_tokens_approximately,
+            strategy="last",
+            start_on="human",
+            include_system=True,
+        )
+        # The message being answered always goes in, shortened if it alone is over budget
+        if not trimmed or trimmed[-1] != selected[-1]:
+            trimmed = system + [_truncate(selected[-1], budget.max_tokens)]
+
+        with self._lock:
+            self.tokens_in[chain] = self.tokens_in.get(chain, 0) + count_tokens_approximately(system + messages)
+            self.tokens_out[chain] = self.tokens_out.get(chain, 0) + count_tokens_approximately(trimmed)
+        return trimmed
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                chain: {
+                    "tokens_in": self.tokens_in.get(chain, 0),
+                    "tokens_out": self.tokens_out.get(chain, 0),
+                    "saved": self.tokens_in.get(chain, 0) - self.tokens_out.get(chain, 0),
+                }
+                for chain in self.budgets
+            }
+
+
+def _parse_budgets(value: str, strategy: str | None) -> dict[str, ContextBudget]:
+    # "router=1000:6,fallback=4000:30" sets max_tokens[:max_messages] per chain
+    budgets = {chain: budget.model_copy() for chain, budget in DEFAULT_CONTEXT_BUDGETS.items()}
+    for item in filter(None, value.split(",")):
+        chain, limits = item.split("=")
+        max_tokens, _, max_messages = limits.partition(":")
+        budget = budgets.get(chain.strip(), ContextBudget(max_tokens=int(max_tokens), max_messages=10))
+        budget.max_tokens = int(max_tokens)
+        if max_messages:
+            budget.max_messages = int(max_messages)
+        budgets[chain.strip()] = budget
+    if strategy:
+        for budget in budgets.values():
+            budget.strategy = strategy
+    return budgets
+
+
+def _build_context_window() -> ContextWindow:
+    return ContextWindow(_parse_budgets(os.getenv("CONTEXT_BUDGETS", ""), os.getenv("CONTEXT_STRATEGY")))
+
+
+def get_context_window() -> ContextWindow:
+    return get_registry().get("context_window", _build_context_window)
@@ -1,7 +1,7 @@
 from langchain_core.messages import BaseMessage, HumanMessage, AIMessage
+from langgraph.config import get_stream_writer
 from src.graph.state import State
-import functools
-import asyncio
+import math
 
 
 def convert_messages_to_langchain_format(messages: list[dict[str, str]]):
@@ -14,36 +14,39 @@ def convert_messages_to_langchain_format(messages: list[dict[str, str]]):
     return langchain_messages
 
 
+def cosine_similarity(a: list[float], b: list[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+def stream_text(text: str):
+    """Send part of a node's reply to stream_mode="custom" listeners before the node returns."""
+    try:
+        writer = get_stream_writer()
+    except RuntimeError:
+        # Called outside a graph run
+        return
+    writer({"text": text})
+
+
+def stream_reset():
+    """Tell stream_mode="custom" listeners to drop the text streamed so far, e.g. when the node fails."""
+    try:
+        writer = get_stream_writer()
+    except RuntimeError:
+        return
+    writer({"reset": True})
+
+
 def error_handler(error_message="Error"):
     def decorator(func):
         async def wrapper(state: State):
             try:
                 return await func(state)
             except Exception as e:
+                # Whatever the node streamed ahead of the failure no longer holds
+                stream_reset()
                 return {"messages": AIMessage(content=f"{error_message}: {e}")}
         return wrapper
     return decorator
-
-
-def retry_async(max_retries=3, delay=1, backoff=2, exceptions=(Exception,)):
-    def decorator(func):
-        @functools.wraps(func)
-        async def wrapper(*args, **kwargs):
-            retry_count = 0
-            current_delay = delay
-            
-            while True:
-                try:
-                    return await func(*args, **kwargs)
-                except exceptions as e:
-                    retry_count += 1
-                    if retry_count > max_retries:
-                        print(f"Failed after {max_retries} retries: {str(e)}")
-                        raise
-                    
-                    print(f"Retry {retry_count}/{max_retries} after error: {str(e)}")
-                    await asyncio.sleep(current_delay)
-                    current_delay *= backoff
-        
-        return wrapper
-    return decorator
\ No newline at end of file
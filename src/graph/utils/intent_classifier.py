@@ -0,0 +1,175 @@
+import os
+import re
+import threading
+from langchain_core.embeddings import Embeddings
+from pydantic import BaseModel
+from src.graph.utils.chains import RouterResponseLiteral
+from src.graph.utils.helpers import cosine_similarity
+from src.modules.resources.resources import get_registry
+
+EMAIL_PATTERN = r"[\w.+-]+@[\w-]+\.[\w.-]+"
+STATUS_PATTERN = r"(todo|to-do|to do|in progress|in-progress|backlog|done|completed|canceled|cancelled)"
+ISSUE_PATTERN = r"(tickets?|issues?|tasks?|todos?)"
+
+# (route, pattern, confidence) - patterns run against the lowercased last human message, in order
+INTENT_RULES: list[tuple[RouterResponseLiteral, str, float]] = [
+    ("fallback", r"^(hi|hey|hello|yo|thanks|thank you|thx|good (morning|afternoon|evening))\b[\s!.,]*(there|lino)?[\s!.]*$", 0.95),
+    ("create_task", r"^(please\s+)?(create|add|open|make|file)\s+(a\s+|an\s+)?(new\s+)?(task|ticket|issue)(\s+(to|for|about|called|named)|\s*:)\s+\S+(\s+\S+){2,}", 0.9),
+    ("get_user_issues", rf"\b(show|list|get|give|what|which|see)\b.*\b{ISSUE_PATTERN}\b.*\b{EMAIL_PATTERN}", 0.95),
+    ("get_user_issues", rf"\b{EMAIL_PATTERN}\b.*\b(working on|assigned|{ISSUE_PATTERN})\b", 0.9),
+    ("get_current_issues", rf"^(please\s+)?(show|list|get|give)( me)?( all)?( the)?( my| our| current| team)*\s+{STATUS_PATTERN}?\s*{ISSUE_PATTERN}\b", 0.9),
+    ("get_current_issues", r"^what('s| is| are)\s+(still\s+)?(in progress|in the backlog|in backlog|on (my|our) plate|left to do)\b", 0.9),
+]
+
+# Verbs for each kind of request; a message that also carries another kind's verbs is left to the LLM
+INTENT_VERBS: dict[str, str] = {
+    "create": r"\b(create|add|make|file)\b|\bopen\s+(a|an|new)\b",
+    "list": r"\b(show|list|get|give|see|display)\b|^(what|which)\b",
+}
+ROUTE_KINDS: dict[str, str] = {"create_task": "create", "get_current_issues": "list", "get_user_issues": "list"}
+
+# Someone other than the user, named without an email; run against the original casing
+PERSON_PATTERN = r"\b(assigned to|assignee|owned by|working on|belonging to)\s+(?!(me|us|myself)\b)\S|\b(for|by|of|from)\s+[A-Z][a-z]+"
+
+# Labelled examples for the optional embedding-similarity classifier
+INTENT_EXAMPLES: list[tuple[RouterResponseLiteral, str]] = [
+    ("fallback", "hey, how's it going?"),
+    ("fallback", "what do you think about remote work?"),
+    ("fallback", "I want to create a task"),
+    ("fallback", "can you show me someone's issues?"),
+    ("create_task", "create a task to fix the login bug on the signup page"),
+    ("create_task", "add a ticket for updating the API documentation with the new endpoints"),
+    ("create_task", "please open an issue to refactor the auth service, assign it to dev@example.com"),
+    ("get_current_issues", "show my todo tickets"),
+    ("get_current_issues", "what's in progress right now?"),
+    ("get_current_issues", "list the backlog"),
+    ("get_user_issues", "what is alex@example.com working on?"),
+    ("get_user_issues", "show issues assigned to maria@example.com"),
+]
+
+DEFAULT_THRESHOLDS: dict[str, float] = {
+    "fallback": 0.9,
+    "create_task": 0.85,
+    "get_current_issues": 0.85,
+    "get_user_issues": 0.85,
+}
+
+
+class IntentPrediction(BaseModel):
+    next_node: RouterResponseLiteral
+    confidence: float
+    source: str
+
+
+class EmbeddingIntentClassifier:
+    def __init__(self, embeddings: Embeddings, examples: list[tuple[RouterResponseLiteral, str]] = INTENT_EXAMPLES, margin: float = 0.05):
+        self.embeddings = embeddings
+        self.examples = examples
+        self.margin = margin
+        self._vectors: list[list[float]] | None = None
+
+    async def _aget_vectors(self) -> list[list[float]]:
+        if self._vectors is None:
+            self._vectors = await self.embeddings.aembed_documents([text for _, text in self.examples])
+        return self._vectors
+
+    async def aclassify(self, message: str) -> IntentPrediction | None:
+        vectors = await self._aget_vectors()
+        query = await self.embeddings.aembed_query(message)
+
+        best: dict[str, float] = {}
+        for (route, _), vector in zip(self.examples, vectors):
+            best[route] = max(best.get(route, -1.0), cosine_similarity(query, vector))
+        ranked = sorted(best.items(), key=lambda item: item[1], reverse=True)
+        if not ranked:
+            return None
+        if len(ranked) > 1 and ranked[0][1] - ranked[1][1] < self.margin:
+            return None
+        return IntentPrediction(next_node=ranked[0][0], confidence=ranked[0][1], source="embedding")
+
+
+class IntentClassifier:
+    """
+    Zero-network pre-classifier that decides the route for trivially routable
+    messages so the LLM router only sees the ambiguous ones.
+    """
+
+    def __init__(self, thresholds: dict[str, float] | None = None, embedding_classifier: EmbeddingIntentClassifier | None = None):
+        self.thresholds = {**DEFAULT_THRESHOLDS, **(thresholds or {})}
+        self.rules = [(route, re.compile(pattern), confidence) for route, pattern, confidence in INTENT_RULES]
+        self.verbs = {kind: re.compile(pattern) for kind, pattern in INTENT_VERBS.items()}
+        self.email = re.compile(EMAIL_PATTERN)
+        self.person = re.compile(PERSON_PATTERN)
+        self.embedding_classifier = embedding_classifier
+        self.total = 0
+        self.hits: dict[str, int] = {route: 0 for route in DEFAULT_THRESHOLDS}
+        self._lock = threading.Lock()
+
+    def _accept(self, prediction: IntentPrediction | None) -> IntentPrediction | None:
+        if prediction and prediction.confidence >= self.thresholds.get(prediction.next_node, 1.0):
+            return prediction
+        return None
+
+    def _ambiguous(self, route: str, message: str, text: str) -> bool:
+        kind = ROUTE_KINDS.get(route)
+        if kind is None:
+            return False
+        if any(pattern.search(text) for other, pattern in self.verbs.items() if other != kind):
+            return True
+        # Listing someone else's issues needs their email; the LLM can ask for it
+        return kind == "list" and not self.email.search(text) and bool(self.person.search(" ".join(message.split())))
+
+    def classify_rules(self, message: str) -> IntentPrediction | None:
+        text = " ".join(message.lower().split())
+        for route, pattern, confidence in self.rules:
+            if pattern.search(text):
+                if self._ambiguous(route, message, text):
+                    return None
+                return self._accept(IntentPrediction(next_node=route, confidence=confidence, source="rule"))
+        return None
+
+    async def aclassify(self, message: str) -> IntentPrediction | None:
+        prediction = self.classify_rules(message)
+        if prediction is None and self.embedding_classifier is not None:
+            prediction = self._accept(await self.embedding_classifier.aclassify(message))
+
+        with self._lock:
+            self.total += 1
+            if prediction is not None:
+                self.hits[prediction.next_node] += 1
+        return prediction
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits = sum(self.hits.values())
+            return {
+                "total": self.total,
+                "hits": dict(self.hits),
+                "llm_fallthrough": self.total - hits,
+                "hit_rate": hits / self.total if self.total else 0.0,
+            }
+
+
+def _parse_thresholds(value: str) -> dict[str, float]:
+    thresholds = {}
+    for item in filter(None, value.split(",")):
+        route, threshold = item.split("=")
+        thresholds[route.strip()] = float(threshold)
+    return thresholds
+
+
+def _build_intent_classifier() -> IntentClassifier:
+    embedding_classifier = None
+    if os.getenv("FAST_ROUTER_EMBEDDINGS", "false").lower() == "true":
+        from src.modules.memory.memory_service import get_memory_manager
+        embedding_classifier = EmbeddingIntentClassifier(get_memory_manager().embeddings)
+    return IntentClassifier(
+        thresholds=_parse_thresholds(os.getenv("FAST_ROUTER_THRESHOLDS", "")),
+        embedding_classifier=embedding_classifier,
+    )
+
+
+def get_intent_classifier() -> IntentClassifier | None:
+    if os.getenv("FAST_ROUTER", "true").lower() != "true":
+        return None
+    return get_registry().get("intent_classifier", _build_intent_classifier)
@@ -5,6 +5,7 @@ FUNCTION REQUIREMENTS:
 - get_user_issues: Requires user email address
 
 FUNCTION-SPECIFIC RULES:
+- create_task: Can create several tasks at once when the user lists multiple items.
 - create_task: Do not ask specific user email address. If the user does not provide an email address, return an empty string.
 - get_current_issues: Should be used when user wants in general todos and doesn't provide an email address
 - get_user_issues: MUST be used when user asks for issues AND provides an email address
@@ -111,6 +112,22 @@ If the user asks you to suggest a task without providing specifics, suggest a re
 
 
 
+SUMMARY_PROMPT = """
+Summarize the conversation below between the user and Lino, a project manager assistant.
+Extend the existing summary, if there is one, with the new messages.
+
+Keep:
+- Facts the user shared about themselves, their team and their work
+- Tasks that were created, listed or discussed, with names and assignee emails
+- Open questions and anything the user asked Lino to remember
+
+Write at most 150 words of plain text.
+
+Existing summary:
+{summary}
+"""
+
+
 MEMORY_ANALYSIS_PROMPT = """Extract and format important personal facts about the user from their message.
 Focus on the actual information, not meta-commentary or requests.
 
@@ -173,6 +190,7 @@ Output:
 CREATE_TASK_PROMPT = """
 You are a task creator. You will be given a task name and a description.
 Extract the task name and description from the user's message.
+If the user asks for several tasks at once (for example a list of action items), extract every one of them as a separate task.
 If description is not provided, or is not clear, generate a description based on the task name and fill it.
 Also if user provide a email address, to assign the task to a specific user.
 Do not imagine email addresses. If the user does not provide an email address, return an empty string.
@@ -190,3 +208,17 @@ The user will provide a email address. If the email address is not provided, def
 Message should be short and concise, If user ask something, follow the user's instructions, if not, just return the list of issues and ask what should be next ticket.
 """
 
+
+
+FUSED_ROUTER_PROMPT = ROUTER_PROMPT + """
+
+ARGUMENT EXTRACTION:
+Together with the output type, fill the 'payload' with the arguments of the chosen function.
+'fallback' has no payload.
+
+For 'create_task':
+""" + CREATE_TASK_PROMPT + """
+For 'get_current_issues':
+""" + GET_CURRENT_ISSUES_PROMPT + """
+For 'get_user_issues':
+""" + GET_USER_ISSUES_PROMPT
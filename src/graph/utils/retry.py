@@ -0,0 +1,121 @@
+import asyncio
+import os
+import random
+import time
+from typing import Awaitable, Callable, TypeVar
+import httpx
+from pydantic import BaseModel, ValidationError
+from src.modules.resources.tracing import get_tracer
+
+T = TypeVar("T")
+
+# Provider SDK errors are matched by class name so no SDK has to be imported here
+RETRYABLE_ERROR_NAMES = (
+    "ServiceUnavailable",
+    "InternalServerError",
+    "DeadlineExceeded",
+    "ResourceExhausted",
+    "TooManyRequests",
+    "RateLimitError",
+    "ServerError",
+    "Timeout",
+)
+FATAL_ERROR_NAMES = (
+    "InvalidArgument",
+    "InvalidRequest",
+    "PermissionDenied",
+    "Unauthenticated",
+    "Authentication",
+    "NotFound",
+    "ContextOverflow",
+)
+
+
+class TurnDeadlineExceeded(Exception):
+    retryable = False
+
+
+class RetryPolicy(BaseModel):
+    max_attempts: int = 3
+    base_delay: float = 0.5
+    max_delay: float = 4.0
+    backoff: float = 2.0
+
+    def delay(self, attempt: int) -> float:
+        # Full jitter: spread retries from concurrent turns instead of synchronising them
+        return random.uniform(0, min(self.max_delay, self.base_delay * self.backoff ** (attempt - 1)))
+
+
+RETRY_POLICIES: dict[str, RetryPolicy] = {
+    "llm": RetryPolicy(max_attempts=3, base_delay=1.0, max_delay=4.0),
+    "linear_query": RetryPolicy(max_attempts=3, base_delay=0.5, max_delay=2.0),
+    # Mutations are only retried because issue creation is idempotent (client-supplied issue ids)
+    "linear_mutation": RetryPolicy(max_attempts=2, base_delay=0.5, max_delay=2.0),
+}
+
+TURN_DEADLINE = float(os.getenv("TURN_DEADLINE", 45.0))
+
+
+def _status_code(error: BaseException) -> int | None:
+    for attribute in ("status_code", "http_status", "code"):
+        value = getattr(error, attribute, None)
+        if isinstance(value, int):
+            return value
+    response = getattr(error, "response", None)
+    return getattr(response, "status_code", None) if response is not None else None
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Transient transport/server failures are retryable; bad input and missing entities are not."""
+    while error is not None:
+        explicit = getattr(error, "retryable", None)
+        if explicit is not None:
+            return explicit
+        if isinstance(error, (ValidationError, ValueError, TypeError, KeyError)):
+            return False
+        if isinstance(error, (httpx.TimeoutException, httpx.TransportError, asyncio.TimeoutError, ConnectionError)):
+            return True
+
+        name = type(error).__name__
+        if any(fatal in name for fatal in FATAL_ERROR_NAMES):
+            return False
+        if any(retryable in name for retryable in RETRYABLE_ERROR_NAMES):
+            return True
+
+        status_code = _status_code(error)
+        if status_code is not None and 100 <= status_code < 600:
+            return status_code in (408, 429) or status_code >= 500
+
+        error = error.__cause__ or error.__context__
+    return False
+
+
+def new_deadline(seconds: float = TURN_DEADLINE) -> float:
+    return time.time() + seconds
+
+
+async def retry_step(step: str, func: Callable[[], Awaitable[T]], deadline: float | None = None) -> T:
+    """
+    Run one I/O step (an LLM call, a Linear query or a mutation) under its own
+    retry policy, so a failure only repeats the step that failed.
+    """
+    policy = RETRY_POLICIES[step]
+    tracer = get_tracer()
+    attempt = 0
+    with tracer.span(f"step.{step}") as span:
+        while True:
+            attempt += 1
+            span.set(attempts=attempt)
+            if deadline is not None and time.time() >= deadline:
+                raise TurnDeadlineExceeded(f"Turn deadline exceeded before {step} step")
+            try:
+                return await func()
+            except Exception as e:
+                if attempt >= policy.max_attempts or not is_retryable(e):
+                    raise
+                delay = policy.delay(attempt)
+                if deadline is not None and time.time() + delay >= deadline:
+                    raise
+                span.add_event("retry", attempt=attempt, delay=delay, error=f"{type(e).__name__}: {e}")
+                tracer.count("retries", step=step)
+                await asyncio.sleep(delay)
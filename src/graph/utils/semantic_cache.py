@@ -0,0 +1,129 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+from langchain_core.embeddings import Embeddings
+from langchain_core.messages import BaseMessage
+from src.graph.utils.helpers import cosine_similarity
+from src.modules.resources.resources import get_registry
+from src.modules.resources.tracing import get_tracer
+
+
+class SemanticCache:
+    """
+    LRU cache for LLM extraction outputs of read-only routes.
+
+    Exact matches on the normalized message are free; when an embedding model
+    is configured, near-identical messages above the similarity threshold hit
+    too, at the cost of one embedding call instead of an LLM call. Entries are
+    also keyed on the context the output was extracted from, so a follow-up only
+    hits an entry made after the same earlier turns.
+    """
+
+    def __init__(self, embeddings: Embeddings | None = None, threshold: float = 0.95, max_size: int = 256, ttl: float = 600.0):
+        self.embeddings = embeddings
+        self.threshold = threshold
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(text: str) -> str:
+        return " ".join(text.lower().split()).strip(" ?!.")
+
+    def _evict_expired(self):
+        now = time.monotonic()
+        for key in [key for key, (expires_at, _, _) in self._entries.items() if expires_at < now]:
+            del self._entries[key]
+
+    async def alookup(self, route: str, text: str, context: str = "") -> tuple[Any, list[float] | None]:
+        key = (route, context, self._normalize(text))
+        with self._lock:
+            self._evict_expired()
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+        if entry is not None:
+            get_tracer().count("cache", hit=True, cache="extraction")
+            return entry[2], entry[1]
+
+        if self.embeddings is None:
+            with self._lock:
+                self.misses += 1
+            get_tracer().count("cache", hit=False, cache="extraction")
+            return None, None
+
+        vector = await self.embeddings.aembed_query(text)
+        with self._lock:
+            best_key, best_score = None, self.threshold
+            for entry_key, (_, entry_vector, _) in self._entries.items():
+                if entry_key[:2] != (route, context) or entry_vector is None:
+                    continue
+                score = cosine_similarity(vector, entry_vector)
+                if score >= best_score:
+                    best_key, best_score = entry_key, score
+            if best_key is None:
+                self.misses += 1
+            else:
+                self._entries.move_to_end(best_key)
+                self.semantic_hits += 1
+                value = self._entries[best_key][2]
+        get_tracer().count("cache", hit=best_key is not None, cache="extraction", match="semantic")
+        return (value, vector) if best_key is not None else (None, vector)
+
+    def set(self, route: str, text: str, value: Any, vector: list[float] | None = None, context: str = ""):
+        key = (route, context, self._normalize(text))
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, vector, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+            }
+
+
+def context_key(messages: list[BaseMessage]) -> str:
+    """Digest of the messages an extraction saw besides the one being answered; empty when there are none."""
+    if not messages:
+        return ""
+    digest = hashlib.sha256()
+    for message in messages:
+        digest.update(f"{message.type}\0{message.content}\0".encode())
+    return digest.hexdigest()
+
+
+def _build_extraction_cache() -> SemanticCache:
+    embeddings = None
+    if os.getenv("EXTRACTION_CACHE_EMBEDDINGS", "false").lower() == "true":
+        from src.modules.memory.memory_service import get_memory_manager
+        embeddings = get_memory_manager().embeddings
+    return SemanticCache(
+        embeddings=embeddings,
+        threshold=float(os.getenv("EXTRACTION_CACHE_THRESHOLD", 0.95)),
+        max_size=int(os.getenv("EXTRACTION_CACHE_MAX_SIZE", 256)),
+        ttl=float(os.getenv("EXTRACTION_CACHE_TTL", 600.0)),
+    )
+
+
+def get_extraction_cache() -> SemanticCache | None:
+    if os.getenv("EXTRACTION_CACHE", "true").lower() != "true":
+        return None
+    return get_registry().get("extraction_cache", _build_extraction_cache)
@@ -1,11 +1,15 @@
+from typing import Literal, Union
 from pydantic import BaseModel, Field
 from src.modules.linear.linear import TicketStatus
 
-class CreateTaskResponse(BaseModel):
+class TaskDraft(BaseModel):
     task_name: str = Field(description="The name of the task")
     description: str = Field(description="The description of the task. If description is not provided, or is not clear, generate a description based on the task name and fill it.")
     assignee_email: str | None = Field(description="The email address of the assignee. If user do not mention any email address, return empty string.")
-    message: str = Field(description="The message to the user. This message should be short and concise, About the task that was created.")
+
+class CreateTasksResponse(BaseModel):
+    tasks: list[TaskDraft] = Field(description="Every task the user asked to create, in the order they were mentioned")
+    message: str = Field(description="The message to the user. This message should be short and concise, About the tasks that were created.")
 
 class GetCurrentIssuesResponse(BaseModel):
     status: TicketStatus = Field(description="The status of the task. If user do not mention any status, default to TODO")
@@ -14,3 +18,25 @@ class GetCurrentIssuesResponse(BaseModel):
 class GetUserIssuesResponse(BaseModel):
     email: str = Field(description="The email address of the user. If user do not mention any email address, return empty string.")
     message: str = Field(description="The message to the user. If user ask something, follow the user's instructions, if not, just ask what should you do next.")
+
+
+class FallbackRoute(BaseModel):
+    next_node: Literal["fallback"] = Field(description="Use for normal text message responses")
+
+class CreateTaskRoute(BaseModel):
+    next_node: Literal["create_task"] = Field(description="Use for task creation")
+    payload: CreateTasksResponse
+
+class GetCurrentIssuesRoute(BaseModel):
+    next_node: Literal["get_current_issues"] = Field(description="Use for getting the current todos")
+    payload: GetCurrentIssuesResponse
+
+class GetUserIssuesRoute(BaseModel):
+    next_node: Literal["get_user_issues"] = Field(description="Use for getting the user issues")
+    payload: GetUserIssuesResponse
+
+class FusedRouterResponse(BaseModel):
+    route: Union[FallbackRoute, CreateTaskRoute, GetCurrentIssuesRoute, GetUserIssuesRoute] = Field(
+        discriminator="next_node",
+        description="The next node to go to, together with the arguments extracted for it"
+    )
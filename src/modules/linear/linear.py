@@ -1,8 +1,18 @@
-import requests
+import asyncio
 import os
-from src.modules.linear.linear_queries import GET_TEAM_BY_NAME, GET_TODO_ISSUES_BY_TEAM, GET_USER_BY_EMAIL, GET_USER_ISSUES, GET_TEAM_STATES, CREATE_TEAM_ISSUE
+import re
+import threading
+import time
+from collections import OrderedDict
+from src.modules.linear.linear_queries import GET_TEAM_BY_NAME, GET_USER_BY_EMAIL, GET_USERS, GET_TEAM_STATES, CREATE_TEAM_ISSUE, CARD_FIELDS, MIRROR_FIELDS, build_issues_query, build_bulk_create_issues_mutation
+from src.modules.linear.transport import LinearTransport, get_transport
+from src.modules.linear.mirror import IssueMirror, get_mirror
+from src.modules.linear.scheduler import RateLimitScheduler, RateLimitedError, get_scheduler, retry_after_seconds
+from src.modules.resources.resources import get_registry
+from src.modules.resources.tracing import get_tracer
 from pydantic import BaseModel
 from enum import Enum
+from typing import AsyncIterator, Iterator
 from dotenv import load_dotenv
 
 load_dotenv(override=True)
@@ -30,42 +40,238 @@ class Ticket(BaseModel):
     created_at: str | None = None
     due_date: str | None = None
 
+class BulkCreateResult(BaseModel):
+    index: int
+    success: bool
+    ticket: Ticket | None = None
+    error: str | None = None
+
+
+class IssueFilter(BaseModel):
+    ids: list[str] | None = None
+    team_id: str | None = None
+    state_name: str | None = None
+    state_types: list[str] | None = None
+    assignee_id: str | None = None
+    assignee_email: str | None = None
+    priorities: list[int] | None = None
+    due_after: str | None = None
+    due_before: str | None = None
+    updated_after: str | None = None
+
+    def to_graphql(self) -> dict:
+        issue_filter = {}
+        if self.ids:
+            issue_filter["id"] = {"in": self.ids}
+        if self.team_id:
+            issue_filter["team"] = {"id": {"eq": self.team_id}}
+        state = {}
+        if self.state_name:
+            state["name"] = {"eq": self.state_name}
+        if self.state_types:
+            state["type"] = {"in": self.state_types}
+        if state:
+            issue_filter["state"] = state
+        if self.assignee_id:
+            issue_filter["assignee"] = {"id": {"eq": self.assignee_id}}
+        elif self.assignee_email:
+            issue_filter["assignee"] = {"email": {"eq": self.assignee_email}}
+        if self.priorities:
+            issue_filter["priority"] = {"in": self.priorities}
+        due_date = {}
+        if self.due_after:
+            due_date["gte"] = self.due_after
+        if self.due_before:
+            due_date["lte"] = self.due_before
+        if due_date:
+            issue_filter["dueDate"] = due_date
+        if self.updated_after:
+            issue_filter["updatedAt"] = {"gt": self.updated_after}
+        return issue_filter
+
+
+class NotFoundError(Exception):
+    retryable = False
+
+
+class LinearAPIError(Exception):
+    def __init__(self, message: str, status_code: int):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+_MISSING = object()
+
+
+class TTLCache:
+    def __init__(self, max_size: int = 256, ttl: float = 300.0, name: str | None = None):
+        self.max_size = max_size
+        self.ttl = ttl
+        # Named caches also report hits and misses to the tracer
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            hit = entry is not _MISSING and entry[0] >= time.monotonic()
+            if hit:
+                self._data.move_to_end(key)
+                self.hits += 1
+            else:
+                if entry is not _MISSING:
+                    del self._data[key]
+                self.misses += 1
+        if self.name:
+            get_tracer().count("cache", hit=hit, cache=self.name)
+        return entry[1] if hit else default
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key=_MISSING):
+        with self._lock:
+            if key is _MISSING:
+                self._data.clear()
+            else:
+                self._data.pop(key, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._data)}
+
+
+class MetadataCache:
+    def __init__(self, max_size: int | None = None, ttl: float | None = None):
+        max_size = max_size or int(os.getenv("LINEAR_CACHE_MAX_SIZE", 256))
+        ttl = ttl or float(os.getenv("LINEAR_CACHE_TTL", 300.0))
+        self.team_ids = TTLCache(max_size=max_size, ttl=ttl, name="linear_team_ids")
+        self.team_states = TTLCache(max_size=max_size, ttl=ttl, name="linear_team_states")
+        self.user_ids = TTLCache(max_size=max_size, ttl=ttl, name="linear_user_ids")
+
+    def invalidate(self):
+        self.team_ids.invalidate()
+        self.team_states.invalidate()
+        self.user_ids.invalidate()
+
+    def stats(self) -> dict:
+        return {
+            "team_ids": self.team_ids.stats(),
+            "team_states": self.team_states.stats(),
+            "user_ids": self.user_ids.stats(),
+        }
+
+
+def get_metadata_cache() -> MetadataCache:
+    return get_registry().get("linear_metadata_cache", MetadataCache)
+
+
+def _build_response_cache() -> TTLCache:
+    return TTLCache(
+        max_size=int(os.getenv("LINEAR_RESPONSE_CACHE_MAX_SIZE", 128)),
+        ttl=float(os.getenv("LINEAR_RESPONSE_CACHE_TTL", 30.0)),
+        name="linear_responses",
+    )
+
+
+def get_response_cache() -> TTLCache:
+    return get_registry().get("linear_response_cache", _build_response_cache)
+
+
+def _is_rate_limited(response) -> bool:
+    if response.status_code == 429:
+        return True
+    if response.status_code not in (200, 400):
+        return False
+    try:
+        errors = response.json().get("errors") or []
+    except ValueError:
+        return False
+    return any((error.get("extensions") or {}).get("code") == "RATELIMITED" for error in errors)
+
+
+def _is_not_found_error(error: dict) -> bool:
+    code = (error.get("extensions") or {}).get("code", "")
+    return code in ("ENTITY_NOT_FOUND", "NOT_FOUND") or "not found" in error.get("message", "").lower()
+
+
 class Linear:
-    def __init__(self):
+    def __init__(self, transport: LinearTransport | None = None, metadata_cache: MetadataCache | None = None, response_cache: TTLCache | None = None, scheduler: RateLimitScheduler | None = None, mirror: IssueMirror | None = None):
         self.api_key = os.getenv("LINEAR_API_KEY")
         self.team_name = os.getenv("LINEAR_TEAM_NAME")
         if not self.api_key:
             raise Exception("Not found. that's what she said.")
+        self.transport = transport or get_transport()
+        self.scheduler = scheduler or get_scheduler()
+        self.metadata_cache = metadata_cache or get_metadata_cache()
+        self.response_cache = response_cache or get_response_cache()
+        self.mirror = mirror or get_mirror()
+        self.page_size = int(os.getenv("LINEAR_PAGE_SIZE", 50))
+        self.max_items = int(os.getenv("LINEAR_MAX_ITEMS", 100))
+        self.bulk_chunk_size = int(os.getenv("LINEAR_BULK_CHUNK_SIZE", 10))
 
-    def _run_query(self, query, variables=None):
+    async def _arun_query(self, query, variables=None, raise_errors=True):
         headers = {
             "Authorization": self.api_key,
             "Content-Type": "application/json"
         }
-        response = requests.post(
-            "https://api.linear.app/graphql",
-            json={"query": query, "variables": variables},
-            headers=headers
-        )
+        write = query.lstrip().startswith("mutation")
+        operation = re.match(r"\s*(?:query|mutation)\s+(\w+)", query)
+        with get_tracer().span("linear.query", operation=operation.group(1) if operation else None, write=write) as span:
+            for attempt in range(self.scheduler.max_retries + 1):
+                await self.scheduler.acquire(self.api_key, write=write)
+                response = await self.transport.post(
+                    {"query": query, "variables": variables},
+                    headers=headers
+                )
+                self.scheduler.record(self.api_key, response.headers)
+                if not _is_rate_limited(response):
+                    break
+                span.set(rate_limited=attempt + 1)
+                # Back off at the HTTP layer instead of failing the whole node
+                if attempt == self.scheduler.max_retries:
+                    raise RateLimitedError(f"Query rate limited after {attempt} retries. Response: {response.text}")
+                self.scheduler.throttle(self.api_key, retry_after_seconds(response.headers, default=2 ** attempt))
+            span.set(status_code=response.status_code, response_bytes=len(response.content))
+
         if response.status_code != 200:
-            raise Exception(f"Query failed with status code {response.status_code}. Response: {response.text}")
+            raise LinearAPIError(f"Query failed with status code {response.status_code}. Response: {response.text}", response.status_code)
         
         result = response.json()
         
-        if "errors" in result:
-            error_message = result.get("errors", [])[0].get("message", "Unknown GraphQL error")
+        if "errors" in result and raise_errors:
+            error = result.get("errors", [])[0]
+            error_message = error.get("message", "Unknown GraphQL error")
+            if _is_not_found_error(error):
+                raise NotFoundError(f"GraphQL error: {error_message}")
             raise Exception(f"GraphQL error: {error_message}")
         
         return result
 
+    def _run_query(self, query, variables=None):
+        return self.transport.run_sync(self._arun_query(query, variables))
+
+
+    async def _aget_team_id_by_name(self, name: str) -> str:
+        team_id = self.metadata_cache.team_ids.get(name)
+        if team_id is not None:
+            return team_id
 
-    def _get_team_id_by_name(self, name: str) -> str:
-        result = self._run_query(GET_TEAM_BY_NAME)
+        result = await self._arun_query(GET_TEAM_BY_NAME)
         teams = result.get("data", {}).get("teams", {}).get("nodes", [])
+        for team in teams:
+            self.metadata_cache.team_ids.set(team.get("name"), team.get("id"))
         for team in teams:
             if team.get("name") == name:
                 return team.get("id")
-        raise Exception(f"Team not found: {name}")
+        raise NotFoundError(f"Team not found: {name}")
 
     def _map_issue_to_ticket(self, issue: dict) -> Ticket:
         return Ticket(
@@ -73,7 +279,7 @@ class Linear:
             title=issue.get("title"),
             description=issue.get("description"),
             priority=issue.get("priority"),
-            state=issue.get("state", {}).get("name") or "",
+            state=(issue.get("state") or {}).get("name") or "",
             assignee=Assignee(
                 name=(issue.get("assignee") or {}).get("name") or "",
                 email=(issue.get("assignee") or {}).get("email") or ""
@@ -83,64 +289,370 @@ class Linear:
             due_date=issue.get("dueDate")
         )
     
-    def _get_user_id_by_email(self, email):
-        result = self._run_query(GET_USER_BY_EMAIL, {"email": email})
+    async def _aget_user_id_by_email(self, email):
+        user_id = self.metadata_cache.user_ids.get(email)
+        if user_id is not None:
+            return user_id
+
+        result = await self._arun_query(GET_USER_BY_EMAIL, {"email": email})
         users = result.get("data", {}).get("users", {}).get("nodes", [])
         if not users:
-            raise Exception(f"User not found with email: {email}")
+            raise NotFoundError(f"User not found with email: {email}")
+        self.metadata_cache.user_ids.set(email, users[0].get("id"))
         return users[0].get("id")
 
-    def _get_team_states(self, team_id: str, status: TicketStatus):
-        states_result = self._run_query(GET_TEAM_STATES, {"teamId": team_id})
-        states = states_result.get("data", {}).get("team", {}).get("states", {}).get("nodes", [])
+    async def _aget_team_states(self, team_id: str, status: TicketStatus):
+        states = self.metadata_cache.team_states.get(team_id)
+        if states is None:
+            states_result = await self._arun_query(GET_TEAM_STATES, {"teamId": team_id})
+            states = states_result.get("data", {}).get("team", {}).get("states", {}).get("nodes", [])
+            self.metadata_cache.team_states.set(team_id, states)
         
         for state_item in states:
             if state_item.get("name") == status.value:
                 return state_item.get("id")
-        raise Exception(f"State not found: {status.value}")
+        self.metadata_cache.team_states.invalidate(team_id)
+        raise NotFoundError(f"State not found: {status.value}")
+
+    def _invalidate_metadata(self, team_id: str | None = None, email: str | None = None):
+        self.metadata_cache.team_ids.invalidate(self.team_name)
+        if team_id:
+            self.metadata_cache.team_states.invalidate(team_id)
+        if email:
+            self.metadata_cache.user_ids.invalidate(email)
     
-    def get_team_tickets(self, status: TicketStatus) -> list[Ticket]:
-        team_id = self._get_team_id_by_name(self.team_name)
+    def _fresh_mirror(self) -> IssueMirror | None:
+        return self.mirror if self.mirror is not None and self.mirror.is_fresh() else None
+
+    def _mirror_created(self, issues: list[dict], team_id: str):
+        if self.mirror is None:
+            return
+        try:
+            for issue in issues:
+                self.mirror.upsert_issue(issue, team_id)
+        except Exception as e:
+            get_tracer().event("mirror_write_failed", error=f"{type(e).__name__}: {e}")
+            get_tracer().count("mirror_write_failures")
+
+    async def _aiter_pages(self, query: str, variables: dict, connection_path: tuple[str, ...], page_size: int, max_items: int | None) -> AsyncIterator[list[dict]]:
+        remaining = max_items
+        page_variables = {**variables, "first": min(page_size, remaining) if remaining else page_size, "after": None}
+        # The next page is requested before the current one is handed out, so consumers overlap with I/O
+        next_page = asyncio.ensure_future(self._arun_query(query, page_variables))
+        try:
+            while next_page is not None:
+                result = await next_page
+                next_page = None
+
+                connection = result.get("data", {})
+                for key in connection_path:
+                    connection = (connection or {}).get(key) or {}
+                issues = connection.get("nodes", [])
+                page_info = connection.get("pageInfo") or {}
+
+                if remaining is not None:
+                    issues = issues[:remaining]
+                    remaining -= len(issues)
+
+                if page_info.get("hasNextPage") and page_info.get("endCursor") and (remaining is None or remaining > 0):
+                    page_variables = {
+                        **page_variables,
+                        "first": min(page_size, remaining) if remaining else page_size,
+                        "after": page_info.get("endCursor"),
+                    }
+                    next_page = asyncio.ensure_future(self._arun_query(query, page_variables))
+
+                yield issues
+        finally:
+            if next_page is not None:
+                next_page.cancel()
+
+    async def aiter_raw_issue_pages(self, issue_filter: IssueFilter, fields: tuple[str, ...] = CARD_FIELDS, page_size: int | None = None, max_items: int | None = None, include_archived: bool = False) -> AsyncIterator[list[dict]]:
+        variables = {"filter": issue_filter.to_graphql()}
+        if include_archived:
+            variables["includeArchived"] = True
+        async for page in self._aiter_pages(
+            build_issues_query(fields),
+            variables,
+            ("issues",),
+            page_size or self.page_size,
+            max_items,
+        ):
+            yield page
+
+    async def aiter_user_pages(self, page_size: int | None = None) -> AsyncIterator[list[dict]]:
+        async for page in self._aiter_pages(GET_USERS, {}, ("users",), page_size or self.page_size, None):
+            yield page
+
+    async def aiter_issues(self, issue_filter: IssueFilter, fields: tuple[str, ...] = CARD_FIELDS, page_size: int | None = None, max_items: int | None = None) -> AsyncIterator[Ticket]:
+        async for page in self.aiter_raw_issue_pages(issue_filter, fields, page_size, max_items):
+            for issue in page:
+                yield self._map_issue_to_ticket(issue)
+
+    def iter_issues(self, issue_filter: IssueFilter, fields: tuple[str, ...] = CARD_FIELDS, page_size: int | None = None, max_items: int | None = None) -> Iterator[Ticket]:
+        return self._iter_sync(self.aiter_issues(issue_filter, fields, page_size, max_items))
+
+    async def aget_issues(self, issue_filter: IssueFilter, fields: tuple[str, ...] = CARD_FIELDS) -> list[Ticket]:
+        return [ticket async for ticket in self.aiter_issues(issue_filter, fields, max_items=self.max_items)]
+
+    def get_issues(self, issue_filter: IssueFilter, fields: tuple[str, ...] = CARD_FIELDS) -> list[Ticket]:
+        return self.transport.run_sync(self.aget_issues(issue_filter, fields))
+
+    async def aiter_team_ticket_pages(self, status: TicketStatus, page_size: int | None = None, max_items: int | None = None, fields: tuple[str, ...] = CARD_FIELDS) -> AsyncIterator[list[Ticket]]:
+        yielded = False
+        for attempt in range(2):
+            team_id = await self._aget_team_id_by_name(self.team_name)
+            issue_filter = IssueFilter(team_id=team_id, state_name=status.value)
+            try:
+                async for page in self.aiter_raw_issue_pages(issue_filter, fields, page_size, max_items):
+                    yielded = True
+                    yield [self._map_issue_to_ticket(issue) for issue in page]
+                return
+            except NotFoundError:
+                if yielded or attempt:
+                    raise
+                self._invalidate_metadata(team_id)
+
+    async def aiter_team_tickets(self, status: TicketStatus, page_size: int | None = None, max_items: int | None = None, fields: tuple[str, ...] = CARD_FIELDS) -> AsyncIterator[Ticket]:
+        async for page in self.aiter_team_ticket_pages(status, page_size, max_items, fields):
+            for ticket in page:
+                yield ticket
+
+    def iter_team_tickets(self, status: TicketStatus, page_size: int | None = None, max_items: int | None = None, fields: tuple[str, ...] = CARD_FIELDS) -> Iterator[Ticket]:
+        return self._iter_sync(self.aiter_team_tickets(status, page_size, max_items, fields))
+
+    def _iter_sync(self, iterator: AsyncIterator) -> Iterator:
+        async def anext_item():
+            return await iterator.__anext__()
+
+        try:
+            while True:
+                try:
+                    yield self.transport.run_sync(anext_item())
+                except StopAsyncIteration:
+                    return
+        finally:
+            self.transport.run_sync(iterator.aclose())
+
+    async def _aiter_listing(self, cache_key: tuple, mirror_issues, pages: AsyncIterator[list[Ticket]]) -> AsyncIterator[list[Ticket]]:
+        if mirror_issues is not None:
+            await pages.aclose()
+            yield [self._map_issue_to_ticket(issue) for issue in mirror_issues]
+            return
+
+        cached = self.response_cache.get(cache_key)
+        if cached is not None:
+            await pages.aclose()
+            yield list(cached)
+            return
+
+        tickets = []
+        async for page in pages:
+            tickets.extend(page)
+            yield page
+        self.response_cache.set(cache_key, tickets)
+
+    def astream_team_tickets(self, status: TicketStatus, fields: tuple[str, ...] = CARD_FIELDS) -> AsyncIterator[list[Ticket]]:
+        """
+        The team's tickets in status a page at a time, so the first page can be
+        shown while the next one loads. Up to max_items + 1 tickets come back:
+        the extra one only tells the caller that the list goes on.
+        """
+        mirror = self._fresh_mirror()
+        mirror_issues = mirror.team_issues(self.team_name, status.value, self.max_items + 1) if mirror is not None else None
+        return self._aiter_listing(
+            ("team_tickets", self.team_name, status.value, fields),
+            mirror_issues,
+            self.aiter_team_ticket_pages(status, max_items=self.max_items + 1, fields=fields),
+        )
+
+    async def aget_team_tickets(self, status: TicketStatus, fields: tuple[str, ...] = CARD_FIELDS) -> list[Ticket]:
+        tickets = [ticket async for page in self.astream_team_tickets(status, fields) for ticket in page]
+        return tickets[:self.max_items]
+
+    def get_team_tickets(self, status: TicketStatus, fields: tuple[str, ...] = CARD_FIELDS) -> list[Ticket]:
+        return self.transport.run_sync(self.aget_team_tickets(status, fields))
+
+    async def _abuild_create_variables(self, ticket: Ticket) -> dict:
+        team_id = await self._aget_team_id_by_name(self.team_name)
         
-        variables = {"teamId": team_id, "status": status.value}
-        result = self._run_query(GET_TODO_ISSUES_BY_TEAM, variables)
+        todo_state_id = await self._aget_team_states(team_id, TicketStatus.TODO)
         
-        issues = result.get("data", {}).get("issues", {}).get("nodes", [])
-        return [self._map_issue_to_ticket(issue) for issue in issues]
+        variables = {
+            "id": ticket.id,
+            "teamId": team_id,
+            "title": ticket.title,
+            "description": ticket.description or "",
+            "stateId": todo_state_id
+        }
+        
+        if ticket.assignee and ticket.assignee.email:
+            variables["assigneeId"] = await self._aget_user_id_by_email(ticket.assignee.email)
+        return variables
+
+    async def _afind_created_issues(self, issue_ids: list[str]) -> dict[str, Ticket]:
+        if not issue_ids:
+            return {}
+        try:
+            tickets = [ticket async for ticket in self.aiter_issues(IssueFilter(ids=issue_ids), max_items=len(issue_ids))]
+        except Exception:
+            return {}
+        return {ticket.id: ticket for ticket in tickets}
+
+    async def acreate_team_ticket(self, ticket: Ticket) -> Ticket:
+        """
+        Create one issue. When ticket.id is set it is sent as the issue id, which
+        makes retries idempotent: a retry after a lost response finds the issue
+        instead of creating a duplicate.
+        """
+        email = ticket.assignee.email if ticket.assignee else None
+        try:
+            variables = await self._abuild_create_variables(ticket)
+            try:
+                result = await self._arun_query(CREATE_TEAM_ISSUE, variables)
+            except NotFoundError:
+                # Cached ids may have gone stale (deleted state, deactivated user)
+                self._invalidate_metadata(variables["teamId"], email)
+                variables = await self._abuild_create_variables(ticket)
+                result = await self._arun_query(CREATE_TEAM_ISSUE, variables)
+            # Any cached listing may now be missing the new issue
+            self.response_cache.invalidate()
+            issue = result.get("data", {}).get("issueCreate", {}).get("issue", {})
+            if issue.get("id"):
+                self._mirror_created([issue], variables["teamId"])
+            return self._map_issue_to_ticket(issue)
+        except Exception as e:
+            if ticket.id:
+                existing = (await self._afind_created_issues([ticket.id])).get(ticket.id)
+                if existing is not None:
+                    self.response_cache.invalidate()
+                    return existing
+            raise Exception(f"Error creating ticket: {e}") from e
 
     def create_team_ticket(self, ticket: Ticket) -> Ticket:
+        return self.transport.run_sync(self.acreate_team_ticket(ticket))
+
+    async def _acreate_chunk(self, chunk: list[tuple[int, dict]]) -> list[BulkCreateResult]:
+        mutation = build_bulk_create_issues_mutation(len(chunk), MIRROR_FIELDS if self.mirror is not None else CARD_FIELDS)
+        variables = {f"input{i}": issue_input for i, (_, issue_input) in enumerate(chunk)}
         try:
-            team_id = self._get_team_id_by_name(self.team_name)
-            
-            todo_state_id = self._get_team_states(team_id, TicketStatus.TODO)
-            
-            variables = {
+            result = await self._arun_query(mutation, variables, raise_errors=False)
+        except Exception as e:
+            return [BulkCreateResult(index=index, success=False, error=str(e)) for index, _ in chunk]
+
+        errors = {}
+        for error in result.get("errors", []):
+            alias = (error.get("path") or [None])[0]
+            errors.setdefault(alias, error.get("message", "Unknown GraphQL error"))
+
+        data = result.get("data") or {}
+        results = []
+        created = []
+        for i, (index, _) in enumerate(chunk):
+            payload = data.get(f"issue{i}") or {}
+            if payload.get("success") and payload.get("issue"):
+                created.append(payload["issue"])
+                results.append(BulkCreateResult(index=index, success=True, ticket=self._map_issue_to_ticket(payload["issue"])))
+            else:
+                error = errors.get(f"issue{i}") or errors.get(None) or "Issue was not created"
+                results.append(BulkCreateResult(index=index, success=False, error=error))
+        self._mirror_created(created, chunk[0][1]["teamId"])
+        return results
+
+    async def acreate_team_tickets(self, tickets: list[Ticket], chunk_size: int | None = None) -> list[BulkCreateResult]:
+        if not tickets:
+            return []
+        team_id = await self._aget_team_id_by_name(self.team_name)
+        todo_state_id = await self._aget_team_states(team_id, TicketStatus.TODO)
+
+        emails = {ticket.assignee.email for ticket in tickets if ticket.assignee and ticket.assignee.email}
+        assignee_ids: dict[str, str | Exception] = {}
+        for email in emails:
+            try:
+                assignee_ids[email] = await self._aget_user_id_by_email(email)
+            except Exception as e:
+                assignee_ids[email] = e
+
+        results: list[BulkCreateResult] = []
+        pending: list[tuple[int, dict]] = []
+        for index, ticket in enumerate(tickets):
+            issue_input = {
                 "teamId": team_id,
                 "title": ticket.title,
                 "description": ticket.description or "",
-                "stateId": todo_state_id
+                "stateId": todo_state_id,
             }
-            
-            if ticket.assignee and ticket.assignee.email:
-                variables["assigneeId"] = self._get_user_id_by_email(ticket.assignee.email)
-            
-            result = self._run_query(CREATE_TEAM_ISSUE, variables)
-            issue = result.get("data", {}).get("issueCreate", {}).get("issue", {})
-            return self._map_issue_to_ticket(issue)
-        except Exception as e:
-            raise Exception(f"Error creating ticket: {e}")
+            if ticket.id:
+                issue_input["id"] = ticket.id
+            email = ticket.assignee.email if ticket.assignee else None
+            if email:
+                assignee_id = assignee_ids[email]
+                if isinstance(assignee_id, Exception):
+                    results.append(BulkCreateResult(index=index, success=False, error=str(assignee_id)))
+                    continue
+                issue_input["assigneeId"] = assignee_id
+            pending.append((index, issue_input))
 
-    def get_user_issues(self, user_email: str) -> list[Ticket]:
-        user_id = self._get_user_id_by_email(user_email)
-        
-        result = self._run_query(GET_USER_ISSUES, {"userId": user_id})
-        
-        issues = result.get("data", {}).get("user", {}).get("assignedIssues", {}).get("nodes", [])
-        
-        return [self._map_issue_to_ticket(issue) for issue in issues]
+        chunk_size = chunk_size or self.bulk_chunk_size
+        for start in range(0, len(pending), chunk_size):
+            results.extend(await self._acreate_chunk(pending[start:start + chunk_size]))
+
+        # Items that report failure but carry a client id may have been created before the error
+        ids = {result.index: tickets[result.index].id for result in results if not result.success and tickets[result.index].id}
+        if ids:
+            existing = await self._afind_created_issues(list(ids.values()))
+            for i, result in enumerate(results):
+                if existing.get(ids.get(result.index)) is not None:
+                    results[i] = BulkCreateResult(index=result.index, success=True, ticket=existing[ids[result.index]])
+
+        if any(result.success for result in results):
+            self.response_cache.invalidate()
+        return sorted(results, key=lambda result: result.index)
+
+    def create_team_tickets(self, tickets: list[Ticket], chunk_size: int | None = None) -> list[BulkCreateResult]:
+        return self.transport.run_sync(self.acreate_team_tickets(tickets, chunk_size))
+
+    async def aiter_user_issue_pages(self, user_email: str, page_size: int | None = None, max_items: int | None = None, fields: tuple[str, ...] = CARD_FIELDS) -> AsyncIterator[list[Ticket]]:
+        yielded = False
+        for attempt in range(2):
+            user_id = await self._aget_user_id_by_email(user_email)
+            try:
+                async for page in self.aiter_raw_issue_pages(IssueFilter(assignee_id=user_id), fields, page_size, max_items):
+                    yielded = True
+                    yield [self._map_issue_to_ticket(issue) for issue in page]
+                return
+            except NotFoundError:
+                if yielded or attempt:
+                    raise
+                self._invalidate_metadata(email=user_email)
+
+    async def aiter_user_issues(self, user_email: str, page_size: int | None = None, max_items: int | None = None, fields: tuple[str, ...] = CARD_FIELDS) -> AsyncIterator[Ticket]:
+        async for page in self.aiter_user_issue_pages(user_email, page_size, max_items, fields):
+            for ticket in page:
+                yield ticket
+
+    def iter_user_issues(self, user_email: str, page_size: int | None = None, max_items: int | None = None, fields: tuple[str, ...] = CARD_FIELDS) -> Iterator[Ticket]:
+        return self._iter_sync(self.aiter_user_issues(user_email, page_size, max_items, fields))
+
+    def astream_user_issues(self, user_email: str, fields: tuple[str, ...] = CARD_FIELDS) -> AsyncIterator[list[Ticket]]:
+        """The user's issues a page at a time; like astream_team_tickets, up to max_items + 1 of them."""
+        mirror = self._fresh_mirror()
+        mirror_issues = mirror.user_issues(user_email, self.max_items + 1) if mirror is not None else None
+        return self._aiter_listing(
+            ("user_issues", user_email.strip().lower(), fields),
+            mirror_issues,
+            self.aiter_user_issue_pages(user_email, max_items=self.max_items + 1, fields=fields),
+        )
+
+    async def aget_user_issues(self, user_email: str, fields: tuple[str, ...] = CARD_FIELDS) -> list[Ticket]:
+        tickets = [ticket async for page in self.astream_user_issues(user_email, fields) for ticket in page]
+        return tickets[:self.max_items]
+
+    def get_user_issues(self, user_email: str, fields: tuple[str, ...] = CARD_FIELDS) -> list[Ticket]:
+        return self.transport.run_sync(self.aget_user_issues(user_email, fields))
     
-    def format_tickets(self, tickets: list[Ticket]) -> str:
-        return "\n".join([f"{i+1}. {ticket.title} - {ticket.state}" for i, ticket in enumerate(tickets)])
+    def format_tickets(self, tickets: list[Ticket], start: int = 0) -> str:
+        return "\n".join([f"{i+1}. {ticket.title} - {ticket.state}" for i, ticket in enumerate(tickets, start)])
 
-def get_linear_client():
-    return Linear()
\ No newline at end of file
+def get_linear_client() -> Linear:
+    return get_registry().get("linear_client", Linear)
\ No newline at end of file
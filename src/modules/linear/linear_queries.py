@@ -1,32 +1,64 @@
-GET_TODO_ISSUES_BY_TEAM = """
-    query TodoIssuesInTeam($teamId: ID!, $status: String!) {
-      issues(
-        first: 50,
-        filter: {
-          state: { name: { eq: $status } },
-          team: { id: { eq: $teamId } }
-        }
-      ) {
-        nodes {
-          id
-          title
-          description
-          priority
-          state {
-            name
-          }
-          assignee {
-            name
-            email
-          }
-          url
-          createdAt
-          dueDate
-        }
-      }
-    }
+ISSUE_FIELDS = {
+    "id": "id",
+    "title": "title",
+    "description": "description",
+    "priority": "priority",
+    "state": "state { name type }",
+    "assignee": "assignee { id name email }",
+    "url": "url",
+    "createdAt": "createdAt",
+    "dueDate": "dueDate",
+    "team": "team { id }",
+    "updatedAt": "updatedAt",
+    "archivedAt": "archivedAt",
+    "trashed": "trashed",
+}
+
+# What format_tickets prints, versus everything a task card needs, versus what the local mirror stores
+LISTING_FIELDS = ("id", "title", "state")
+CARD_FIELDS = ("id", "title", "description", "priority", "state", "assignee", "url", "createdAt", "dueDate")
+MIRROR_FIELDS = tuple(ISSUE_FIELDS)
+
+
+def build_issues_query(fields: tuple[str, ...] = CARD_FIELDS) -> str:
+    unknown = set(fields) - set(ISSUE_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown issue fields: {', '.join(sorted(unknown))}")
+    selected = [ISSUE_FIELDS[field] for field in ISSUE_FIELDS if field in fields or field in ("id", "title")]
+    selection = "\n".join(f"          {field}" for field in selected)
+    return f"""
+    query Issues($filter: IssueFilter, $first: Int!, $after: String, $includeArchived: Boolean = false) {{
+      issues(first: $first, after: $after, filter: $filter, includeArchived: $includeArchived) {{
+        pageInfo {{
+          hasNextPage
+          endCursor
+        }}
+        nodes {{
+{selection}
+        }}
+      }}
+    }}
+"""
+
+def build_bulk_create_issues_mutation(count: int, fields: tuple[str, ...] = CARD_FIELDS) -> str:
+    selection = "\n".join(f"          {ISSUE_FIELDS[field]}" for field in ISSUE_FIELDS if field in fields or field in ("id", "title"))
+    arguments = ", ".join(f"$input{i}: IssueCreateInput!" for i in range(count))
+    mutations = "\n".join(
+        f"""      issue{i}: issueCreate(input: $input{i}) {{
+        success
+        issue {{
+{selection}
+        }}
+      }}"""
+        for i in range(count)
+    )
+    return f"""
+    mutation BulkCreateIssues({arguments}) {{
+{mutations}
+    }}
 """
 
+
 GET_TEAM_BY_NAME = """
     query GetTeamId {
       teams {
@@ -48,6 +80,21 @@ GET_USER_BY_EMAIL = """
     }
 """
 
+GET_USERS = """
+    query GetUsers($first: Int!, $after: String) {
+      users(first: $first, after: $after) {
+        pageInfo {
+          hasNextPage
+          endCursor
+        }
+        nodes {
+          id
+          name
+          email
+        }
+      }
+    }
+"""
 
 GET_TEAM_STATES = """
     query GetTeamStates($teamId: String!) {
@@ -56,6 +103,7 @@ GET_TEAM_STATES = """
           nodes {
             id
             name
+            type
           }
         }
       }
@@ -63,9 +111,10 @@ GET_TEAM_STATES = """
 """
 
 CREATE_TEAM_ISSUE = """
-    mutation CreateIssue($teamId: String!, $title: String!, $description: String!, $stateId: String!, $assigneeId: String) {
+    mutation CreateIssue($id: String, $teamId: String!, $title: String!, $description: String!, $stateId: String!, $assigneeId: String) {
       issueCreate(
         input: {
+          id: $id,
           teamId: $teamId,
           title: $title,
           description: $description,
@@ -83,38 +132,15 @@ CREATE_TEAM_ISSUE = """
             name
           }
           assignee {
+            id
             name
             email
           }
           url
           createdAt
           dueDate
+          updatedAt
         }
       }
     }
 """
-
-GET_USER_ISSUES = """
-    query GetUserIssues($userId: String!) {
-        user(id: $userId) {
-            assignedIssues {
-            nodes {
-                id
-                title
-                description
-                priority
-                state {
-                name
-                }
-                assignee {
-                name
-                email
-                }
-                url
-                createdAt
-                dueDate
-            }
-            }
-        }
-    }
-"""
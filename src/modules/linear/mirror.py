@@ -0,0 +1,252 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from src.modules.linear.linear_queries import GET_TEAM_BY_NAME, GET_TEAM_STATES, MIRROR_FIELDS
+from src.modules.resources.resources import get_registry
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS teams (id TEXT PRIMARY KEY, name TEXT);
+    CREATE TABLE IF NOT EXISTS states (id TEXT PRIMARY KEY, team_id TEXT, name TEXT, type TEXT);
+    CREATE TABLE IF NOT EXISTS users (id TEXT PRIMARY KEY, name TEXT, email TEXT);
+    CREATE TABLE IF NOT EXISTS issues (
+        id TEXT PRIMARY KEY,
+        team_id TEXT,
+        state_name TEXT,
+        assignee_id TEXT,
+        created_at TEXT,
+        updated_at TEXT,
+        payload TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS issues_team_state ON issues (team_id, state_name);
+    CREATE INDEX IF NOT EXISTS issues_assignee ON issues (assignee_id);
+    CREATE INDEX IF NOT EXISTS users_email ON users (email);
+    CREATE TABLE IF NOT EXISTS sync_state (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+
+class IssueMirror:
+    """
+    Local SQLite copy of Linear issues, workflow states, teams and users.
+
+    Bootstrapped with a paginated sync, kept current by webhook payloads and
+    an updatedAt-based reconciliation that also catches missed webhooks. The
+    Linear client only reads from it while a reconciliation has succeeded
+    within max_staleness seconds.
+    """
+
+    def __init__(self, path: str, max_staleness: float = 300.0):
+        self.path = path
+        self.max_staleness = max_staleness
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.row_factory = sqlite3.Row
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def _get_sync_state(self, key: str) -> str | None:
+        row = self._connection.execute("SELECT value FROM sync_state WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else None
+
+    def _set_sync_state(self, key: str, value: str):
+        self._connection.execute(
+            "INSERT INTO sync_state (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, value),
+        )
+
+    def is_fresh(self) -> bool:
+        with self._lock:
+            reconciled_at = self._get_sync_state("reconciled_at")
+        return reconciled_at is not None and time.time() - float(reconciled_at) < self.max_staleness
+
+    def _upsert_issue(self, issue: dict, team_id: str | None = None):
+        if "assigneeId" in issue and "assignee" not in issue:
+            # Webhooks may carry only the id; an explicit null means the issue was unassigned
+            issue = {**issue, "assignee": {"id": issue["assigneeId"]} if issue["assigneeId"] else None}
+        assignee = issue.get("assignee") or {}
+        team_id = (issue.get("team") or {}).get("id") or issue.get("teamId") or team_id
+        updated_at = issue.get("updatedAt") or issue.get("createdAt")
+
+        row = self._connection.execute("SELECT updated_at, payload FROM issues WHERE id = ?", (issue["id"],)).fetchone()
+        if row is not None:
+            if row["updated_at"] and updated_at and updated_at < row["updated_at"]:
+                return
+            # Partial payloads (webhooks, mutation results) keep the fields they don't carry
+            issue = {**json.loads(row["payload"]), **{key: value for key, value in issue.items() if value is not None or key in ("assignee", "dueDate")}}
+
+        if assignee.get("id") and not assignee.get("email"):
+            user = self._connection.execute("SELECT name, email FROM users WHERE id = ?", (assignee["id"],)).fetchone()
+            if user is not None:
+                issue["assignee"] = {"id": assignee["id"], "name": assignee.get("name") or user["name"], "email": user["email"]}
+
+        self._connection.execute(
+            """
+            INSERT INTO issues (id, team_id, state_name, assignee_id, created_at, updated_at, payload)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(id) DO UPDATE SET
+                team_id = excluded.team_id,
+                state_name = excluded.state_name,
+                assignee_id = excluded.assignee_id,
+                created_at = excluded.created_at,
+                updated_at = excluded.updated_at,
+                payload = excluded.payload
+            """,
+            (
+                issue["id"],
+                team_id,
+                (issue.get("state") or {}).get("name"),
+                (issue.get("assignee") or {}).get("id"),
+                issue.get("createdAt"),
+                updated_at,
+                json.dumps(issue),
+            ),
+        )
+
+    def upsert_issue(self, issue: dict, team_id: str | None = None):
+        with self._lock, self._connection:
+            self._upsert_issue(issue, team_id)
+
+    def upsert_users(self, users: list[dict]):
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "INSERT INTO users (id, name, email) VALUES (?, ?, ?) ON CONFLICT(id) DO UPDATE SET name = excluded.name, email = excluded.email",
+                [(user["id"], user.get("name"), (user.get("email") or "").lower()) for user in users],
+            )
+
+    def upsert_teams(self, teams: list[dict]):
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "INSERT INTO teams (id, name) VALUES (?, ?) ON CONFLICT(id) DO UPDATE SET name = excluded.name",
+                [(team["id"], team.get("name")) for team in teams],
+            )
+
+    def upsert_states(self, team_id: str, states: list[dict]):
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "INSERT INTO states (id, team_id, name, type) VALUES (?, ?, ?, ?) ON CONFLICT(id) DO UPDATE SET team_id = excluded.team_id, name = excluded.name, type = excluded.type",
+                [(state["id"], team_id, state.get("name"), state.get("type")) for state in states],
+            )
+
+    def apply_webhook(self, payload: dict):
+        action = payload.get("action")
+        entity_type = payload.get("type")
+        data = payload.get("data") or {}
+        if not data.get("id"):
+            return
+
+        with self._lock, self._connection:
+            if entity_type == "Issue":
+                if action == "remove" or data.get("archivedAt") or data.get("trashed"):
+                    self._connection.execute("DELETE FROM issues WHERE id = ?", (data["id"],))
+                else:
+                    self._upsert_issue(data)
+            elif entity_type == "WorkflowState":
+                if action == "remove":
+                    self._connection.execute("DELETE FROM states WHERE id = ?", (data["id"],))
+                else:
+                    self._connection.execute(
+                        "INSERT INTO states (id, team_id, name, type) VALUES (?, ?, ?, ?) ON CONFLICT(id) DO UPDATE SET team_id = excluded.team_id, name = excluded.name, type = excluded.type",
+                        (data["id"], data.get("teamId") or (data.get("team") or {}).get("id"), data.get("name"), data.get("type")),
+                    )
+            elif entity_type == "Team":
+                if action == "remove":
+                    self._connection.execute("DELETE FROM teams WHERE id = ?", (data["id"],))
+                else:
+                    self._connection.execute(
+                        "INSERT INTO teams (id, name) VALUES (?, ?) ON CONFLICT(id) DO UPDATE SET name = excluded.name",
+                        (data["id"], data.get("name")),
+                    )
+            elif entity_type == "User" and action != "remove":
+                self._connection.execute(
+                    "INSERT INTO users (id, name, email) VALUES (?, ?, ?) ON CONFLICT(id) DO UPDATE SET name = excluded.name, email = excluded.email",
+                    (data["id"], data.get("name"), (data.get("email") or "").lower()),
+                )
+
+    def team_issues(self, team_name: str, state_name: str, limit: int) -> list[dict] | None:
+        with self._lock:
+            team = self._connection.execute("SELECT id FROM teams WHERE name = ?", (team_name,)).fetchone()
+            if team is None:
+                return None
+            rows = self._connection.execute(
+                "SELECT payload FROM issues WHERE team_id = ? AND state_name = ? ORDER BY created_at DESC LIMIT ?",
+                (team["id"], state_name, limit),
+            ).fetchall()
+        return [json.loads(row["payload"]) for row in rows]
+
+    def user_issues(self, email: str, limit: int) -> list[dict] | None:
+        with self._lock:
+            user = self._connection.execute("SELECT id FROM users WHERE email = ?", (email.strip().lower(),)).fetchone()
+            if user is None:
+                return None
+            rows = self._connection.execute(
+                "SELECT payload FROM issues WHERE assignee_id = ? ORDER BY created_at DESC LIMIT ?",
+                (user["id"], limit),
+            ).fetchall()
+        return [json.loads(row["payload"]) for row in rows]
+
+    async def areconcile(self, client, full: bool = False):
+        """
+        Pull everything updated since the newest updatedAt we hold, or the whole
+        workspace on first run. Archived and trashed issues are included so ones
+        whose webhook was missed get dropped. Teams, states and users are
+        refreshed each time.
+        """
+        # Imported here: linear.py imports this module to read from the mirror
+        from src.modules.linear.linear import IssueFilter
+
+        started_at = time.time()
+        result = await client._arun_query(GET_TEAM_BY_NAME)
+        teams = result.get("data", {}).get("teams", {}).get("nodes", [])
+        self.upsert_teams(teams)
+        for team in teams:
+            states_result = await client._arun_query(GET_TEAM_STATES, {"teamId": team["id"]})
+            self.upsert_states(team["id"], states_result.get("data", {}).get("team", {}).get("states", {}).get("nodes", []))
+        async for users in client.aiter_user_pages(page_size=250):
+            self.upsert_users(users)
+
+        with self._lock:
+            updated_after = None if full else self._get_sync_state("updated_at")
+        newest = updated_after
+        async for issues in client.aiter_raw_issue_pages(IssueFilter(updated_after=updated_after), MIRROR_FIELDS, page_size=250, include_archived=True):
+            with self._lock, self._connection:
+                for issue in issues:
+                    if issue.get("archivedAt") or issue.get("trashed"):
+                        self._connection.execute("DELETE FROM issues WHERE id = ?", (issue["id"],))
+                    else:
+                        self._upsert_issue(issue)
+                    if issue.get("updatedAt") and (newest is None or issue["updatedAt"] > newest):
+                        newest = issue["updatedAt"]
+
+        with self._lock, self._connection:
+            if newest:
+                self._set_sync_state("updated_at", newest)
+            self._set_sync_state("reconciled_at", str(started_at))
+            self._set_sync_state("reconciled_at_iso", datetime.fromtimestamp(started_at, timezone.utc).isoformat())
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = {
+                table: self._connection.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                for table in ("issues", "states", "teams", "users")
+            }
+            counts["reconciled_at"] = self._get_sync_state("reconciled_at_iso")
+        counts["fresh"] = self.is_fresh()
+        return counts
+
+
+def get_mirror() -> IssueMirror | None:
+    path = os.getenv("LINEAR_MIRROR_PATH")
+    if not path:
+        return None
+    return get_registry().get(
+        "linear_mirror",
+        lambda: IssueMirror(path, max_staleness=float(os.getenv("LINEAR_MIRROR_MAX_STALENESS", 300.0))),
+        close=lambda mirror: mirror.close(),
+    )
@@ -0,0 +1,158 @@
+import asyncio
+import hashlib
+import os
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from src.modules.resources.resources import get_registry
+
+
+class RateLimitedError(Exception):
+    # Already retried with Retry-After at the HTTP layer; re-running the node would only add load
+    retryable = False
+
+
+class TokenBucket:
+    """
+    Client-side view of one API key's request budget.
+
+    Tokens refill continuously at capacity/window, and are corrected from the
+    X-RateLimit-* headers Linear sends back so the bucket tracks the server's
+    actual count rather than our guess.
+    """
+
+    def __init__(self, capacity: int, window: float):
+        self.capacity = capacity
+        self.refill_rate = capacity / window
+        self.tokens = float(capacity)
+        self.complexity_remaining: int | None = None
+        self.complexity_reset_at = 0.0
+        self.blocked_until = 0.0
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated_at) * self.refill_rate)
+        self._updated_at = now
+
+    def try_acquire(self, reserve: float = 0.0) -> float:
+        """Take a token and return 0, or return how many seconds to wait before trying again."""
+        with self._lock:
+            now = time.monotonic()
+            if self.blocked_until > now:
+                return self.blocked_until - now
+            if self.complexity_remaining is not None and self.complexity_remaining <= 0 and self.complexity_reset_at > now:
+                return self.complexity_reset_at - now
+            self._refill(now)
+            if self.tokens - 1 >= reserve:
+                self.tokens -= 1
+                return 0.0
+            return (reserve + 1 - self.tokens) / self.refill_rate
+
+    def update(self, headers) -> None:
+        with self._lock:
+            now = time.monotonic()
+            limit = _header_int(headers, "x-ratelimit-requests-limit")
+            remaining = _header_int(headers, "x-ratelimit-requests-remaining")
+            reset_at = _header_reset(headers, "x-ratelimit-requests-reset", now)
+            if limit:
+                self.capacity = limit
+            if remaining is not None:
+                self._refill(now)
+                self.tokens = float(remaining)
+                if remaining <= 0 and reset_at:
+                    self.blocked_until = max(self.blocked_until, reset_at)
+
+            complexity_remaining = _header_int(headers, "x-ratelimit-complexity-remaining")
+            if complexity_remaining is not None:
+                self.complexity_remaining = complexity_remaining
+                self.complexity_reset_at = _header_reset(headers, "x-ratelimit-complexity-reset", now) or 0.0
+
+    def block_for(self, seconds: float):
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
+def _header_int(headers, name: str) -> int | None:
+    value = headers.get(name)
+    try:
+        return int(float(value)) if value is not None else None
+    except ValueError:
+        return None
+
+
+def _header_reset(headers, name: str, now: float) -> float | None:
+    # Linear sends reset times as UTC epoch milliseconds; convert to our monotonic clock
+    value = _header_int(headers, name)
+    if value is None:
+        return None
+    seconds = value / 1000 if value > 10**11 else value
+    return now + max(0.0, seconds - time.time())
+
+
+def retry_after_seconds(headers, default: float) -> float:
+    value = headers.get("retry-after")
+    if value is None:
+        reset_at = _header_reset(headers, "x-ratelimit-requests-reset", time.monotonic())
+        return max(reset_at - time.monotonic(), 0.0) if reset_at else default
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+
+
+class RateLimitScheduler:
+    """
+    Paces Linear requests per API key. Reads stop short of a reserve slice of
+    the budget so writes (ticket creation) keep going when we're near the limit.
+    """
+
+    def __init__(self, capacity: int | None = None, window: float | None = None, write_reserve: float | None = None, max_wait: float | None = None):
+        self.capacity = capacity or int(os.getenv("LINEAR_RATE_LIMIT", 1500))
+        self.window = window or float(os.getenv("LINEAR_RATE_LIMIT_WINDOW", 3600.0))
+        self.write_reserve = write_reserve if write_reserve is not None else float(os.getenv("LINEAR_WRITE_RESERVE", 0.05)) * self.capacity
+        self.max_wait = max_wait or float(os.getenv("LINEAR_RATE_LIMIT_MAX_WAIT", 60.0))
+        self.max_retries = int(os.getenv("LINEAR_RATE_LIMIT_RETRIES", 3))
+        self.waits = 0
+        self.throttled = 0
+        self._buckets: dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, api_key: str) -> TokenBucket:
+        key = hashlib.sha256(api_key.encode()).hexdigest()
+        with self._lock:
+            if key not in self._buckets:
+                self._buckets[key] = TokenBucket(self.capacity, self.window)
+            return self._buckets[key]
+
+    async def acquire(self, api_key: str, write: bool = False):
+        bucket = self.bucket(api_key)
+        deadline = time.monotonic() + self.max_wait
+        while True:
+            wait = bucket.try_acquire(reserve=0.0 if write else self.write_reserve)
+            if wait <= 0:
+                return
+            if time.monotonic() + wait > deadline:
+                raise RateLimitedError(f"Linear rate limit budget exhausted, retry in {wait:.0f}s")
+            self.waits += 1
+            await asyncio.sleep(wait)
+
+    def record(self, api_key: str, headers):
+        self.bucket(api_key).update(headers)
+
+    def throttle(self, api_key: str, seconds: float):
+        self.throttled += 1
+        self.bucket(api_key).block_for(seconds)
+
+    def stats(self) -> dict:
+        with self._lock:
+            buckets = list(self._buckets.values())
+        return {
+            "waits": self.waits,
+            "throttled": self.throttled,
+            "tokens": [round(bucket.tokens, 1) for bucket in buckets],
+        }
+
+
+def get_scheduler() -> RateLimitScheduler:
+    return get_registry().get("linear_scheduler", RateLimitScheduler)
@@ -0,0 +1,108 @@
+import asyncio
+import os
+import threading
+import weakref
+import httpx
+from pydantic import BaseModel
+from src.modules.resources.background import get_background_worker
+from src.modules.resources.resources import get_registry
+
+LINEAR_API_URL = "https://api.linear.app/graphql"
+
+
+class TransportConfig(BaseModel):
+    url: str = LINEAR_API_URL
+    max_connections: int = 20
+    max_keepalive_connections: int = 10
+    keepalive_expiry: float = 30.0
+    connect_timeout: float = 5.0
+    read_timeout: float = 30.0
+    pool_timeout: float = 10.0
+
+    @classmethod
+    def from_env(cls) -> "TransportConfig":
+        return cls(
+            url=os.getenv("LINEAR_API_URL", LINEAR_API_URL),
+            max_connections=int(os.getenv("LINEAR_MAX_CONNECTIONS", 20)),
+            max_keepalive_connections=int(os.getenv("LINEAR_MAX_KEEPALIVE_CONNECTIONS", 10)),
+            keepalive_expiry=float(os.getenv("LINEAR_KEEPALIVE_EXPIRY", 30.0)),
+            connect_timeout=float(os.getenv("LINEAR_CONNECT_TIMEOUT", 5.0)),
+            read_timeout=float(os.getenv("LINEAR_READ_TIMEOUT", 30.0)),
+            pool_timeout=float(os.getenv("LINEAR_POOL_TIMEOUT", 10.0)),
+        )
+
+
+class LinearTransport:
+    """
+    Shared keep-alive connection pool for the Linear GraphQL endpoint.
+
+    httpx async clients are bound to the event loop they were first used on,
+    so one pooled client is kept per running loop. Synchronous callers are
+    served from the shared background worker loop so they share a single pool too.
+    """
+
+    def __init__(self, config: TransportConfig | None = None):
+        self.config = config or TransportConfig.from_env()
+        self._clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def _build_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=self.config.max_connections,
+                max_keepalive_connections=self.config.max_keepalive_connections,
+                keepalive_expiry=self.config.keepalive_expiry,
+            ),
+            timeout=httpx.Timeout(
+                self.config.read_timeout,
+                connect=self.config.connect_timeout,
+                pool=self.config.pool_timeout,
+            ),
+        )
+
+    def _get_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            client = self._clients.get(loop)
+            if client is None or client.is_closed:
+                client = self._build_client()
+                self._clients[loop] = client
+        return client
+
+    async def post(self, payload: dict, headers: dict) -> httpx.Response:
+        client = self._get_client()
+        return await client.post(self.config.url, json=payload, headers=headers)
+
+    def run_sync(self, coro):
+        return get_background_worker().run(coro)
+
+    async def aclose(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            client = self._clients.pop(loop, None)
+        if client is not None:
+            await client.aclose()
+
+    def close(self):
+        with self._lock:
+            clients = list(self._clients.items())
+            self._clients.clear()
+
+        try:
+            current_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            current_loop = None
+
+        for client_loop, client in clients:
+            if client_loop.is_closed():
+                continue
+            if client_loop is current_loop:
+                current_loop.create_task(client.aclose())
+            elif client_loop.is_running():
+                asyncio.run_coroutine_threadsafe(client.aclose(), client_loop).result()
+            else:
+                client_loop.run_until_complete(client.aclose())
+
+
+def get_transport() -> LinearTransport:
+    return get_registry().get("linear_transport", LinearTransport, close=lambda transport: transport.close())
@@ -0,0 +1,91 @@
+import asyncio
+import hashlib
+import hmac
+import json
+import os
+import time
+from contextlib import asynccontextmanager
+from fastapi import APIRouter, FastAPI, HTTPException, Request
+from src.modules.linear.linear import get_linear_client
+from src.modules.linear.mirror import get_mirror
+
+router = APIRouter()
+
+# Linear signs deliveries and stamps them; anything older than this is treated as a replay
+WEBHOOK_MAX_AGE = float(os.getenv("LINEAR_WEBHOOK_MAX_AGE", 60.0))
+
+
+def verify_signature(body: bytes, signature: str | None, secret: str) -> bool:
+    if not signature:
+        return False
+    expected = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+
+@router.post("/webhooks/linear")
+async def linear_webhook(request: Request):
+    mirror = get_mirror()
+    if mirror is None:
+        raise HTTPException(status_code=404, detail="Issue mirror is not enabled")
+
+    secret = os.getenv("LINEAR_WEBHOOK_SECRET")
+    if not secret:
+        # Unsigned payloads would be served to the agent as ground truth, so refuse them all
+        raise HTTPException(status_code=503, detail="LINEAR_WEBHOOK_SECRET is not configured")
+
+    body = await request.body()
+    if not verify_signature(body, request.headers.get("linear-signature"), secret):
+        raise HTTPException(status_code=401, detail="Invalid signature")
+
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid JSON payload")
+    timestamp = payload.get("webhookTimestamp")
+    if not isinstance(timestamp, (int, float)) or abs(time.time() * 1000 - timestamp) > WEBHOOK_MAX_AGE * 1000:
+        raise HTTPException(status_code=401, detail="Stale webhook")
+
+    mirror.apply_webhook(payload)
+    return {"ok": True}
+
+
+@router.get("/webhooks/linear/stats")
+async def linear_mirror_stats():
+    mirror = get_mirror()
+    if mirror is None:
+        raise HTTPException(status_code=404, detail="Issue mirror is not enabled")
+    return mirror.stats()
+
+
+async def run_reconciler(interval: float | None = None):
+    """Periodic incremental sync that catches missed webhooks and keeps the mirror fresh."""
+    mirror = get_mirror()
+    interval = interval or float(os.getenv("LINEAR_MIRROR_RECONCILE_INTERVAL", 60.0))
+    while True:
+        try:
+            await mirror.areconcile(get_linear_client())
+        except Exception as e:
+            print(f"Error reconciling Linear mirror: {str(e)}")
+        await asyncio.sleep(interval)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    reconciler = asyncio.create_task(run_reconciler()) if get_mirror() is not None else None
+    try:
+        yield
+    finally:
+        if reconciler is not None:
+            reconciler.cancel()
+
+
+def create_app() -> FastAPI:
+    app = FastAPI(lifespan=lifespan)
+    app.include_router(router)
+    return app
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(create_app(), host=os.getenv("HOST", "0.0.0.0"), port=int(os.getenv("LINEAR_WEBHOOK_PORT", 8001)))
@@ -0,0 +1,188 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from langchain_core.embeddings import Embeddings
+from src.modules.resources.resources import get_registry
+from src.modules.resources.tracing import get_tracer
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL, used_at REAL NOT NULL);
+    CREATE INDEX IF NOT EXISTS embeddings_used_at ON embeddings (used_at);
+"""
+
+
+def _key(namespace: str, kind: str, text: str) -> str:
+    # Whitespace and case differences don't change what a message means, so they share an entry
+    normalized = " ".join(text.split()).casefold()
+    return hashlib.sha256(f"{namespace}\0{kind}\0{normalized}".encode()).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Content-hash keyed embedding vectors, in an in-memory LRU backed by an
+    optional SQLite file that every process on the host shares.
+
+    Entries are namespaced by model, and query and document embeddings are
+    kept apart since models like Gemini embed them differently. The disk
+    tier evicts its least recently used rows once it passes max_rows.
+    """
+
+    def __init__(self, path: str | None = None, max_size: int = 2048, max_rows: int = 50000):
+        self.path = path
+        self.max_size = max_size
+        self.max_rows = max_rows
+        self._vectors: OrderedDict[str, list[float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._connection = None
+        if path:
+            self._connection = sqlite3.connect(path, check_same_thread=False, timeout=5)
+            with self._lock, self._connection:
+                self._connection.execute("PRAGMA journal_mode=WAL")
+                self._connection.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def wrap(self, embeddings: Embeddings, namespace: str) -> "CachedEmbeddings":
+        return CachedEmbeddings(embeddings, self, namespace)
+
+    def get_many(self, keys: list[str]) -> dict[str, list[float]]:
+        found = {}
+        with self._lock:
+            for key in keys:
+                vector = self._vectors.get(key)
+                if vector is not None:
+                    self._vectors.move_to_end(key)
+                    found[key] = vector
+                    self.memory_hits += 1
+
+            missing = [key for key in keys if key not in found]
+            if missing and self._connection is not None:
+                placeholders = ",".join("?" * len(missing))
+                with self._connection:
+                    rows = self._connection.execute(
+                        f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", missing
+                    ).fetchall()
+                    self._connection.execute(
+                        f"UPDATE embeddings SET used_at = ? WHERE key IN ({placeholders})", [time.time(), *missing]
+                    )
+                for key, blob in rows:
+                    vector = array("f", blob).tolist()
+                    found[key] = vector
+                    self._remember(key, vector)
+                    self.disk_hits += 1
+
+            self.misses += len([key for key in keys if key not in found])
+        return found
+
+    def put_many(self, vectors: dict[str, list[float]]):
+        with self._lock:
+            for key, vector in vectors.items():
+                self._remember(key, vector)
+            if self._connection is None or not vectors:
+                return
+            now = time.time()
+            with self._connection:
+                self._connection.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, vector, used_at) VALUES (?, ?, ?)",
+                    [(key, array("f", vector).tobytes(), now) for key, vector in vectors.items()],
+                )
+                self._writes += len(vectors)
+                # Counting rows on every write is wasteful; check once the cap could have been passed
+                if self._writes >= self.max_rows // 10:
+                    self._writes = 0
+                    self._connection.execute(
+                        "DELETE FROM embeddings WHERE key IN "
+                        "(SELECT key FROM embeddings ORDER BY used_at DESC LIMIT -1 OFFSET ?)",
+                        (self.max_rows,),
+                    )
+
+    def _remember(self, key: str, vector: list[float]):
+        self._vectors[key] = vector
+        self._vectors.move_to_end(key)
+        while len(self._vectors) > self.max_size:
+            self._vectors.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 3) if lookups else None,
+                "memory_size": len(self._vectors),
+            }
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings that only call the wrapped model for texts the cache hasn't seen."""
+
+    def __init__(self, embeddings: Embeddings, cache: EmbeddingCache, namespace: str):
+        self.embeddings = embeddings
+        self.cache = cache
+        self.namespace = namespace
+
+    def _lookup(self, kind: str, texts: list[str]) -> tuple[list[str], dict[str, list[float]], dict[str, str]]:
+        keys = [_key(self.namespace, kind, text) for text in texts]
+        found = self.cache.get_many(list(dict.fromkeys(keys)))
+        # One request per distinct missing text, even when a batch repeats it
+        missing = {key: text for key, text in zip(keys, texts) if key not in found}
+        get_tracer().count("embedding_cache", len(keys) - len(missing), result="hit")
+        get_tracer().count("embedding_cache", len(missing), result="miss")
+        return keys, found, missing
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        keys, found, missing = self._lookup("document", texts)
+        if missing:
+            vectors = dict(zip(missing, self.embeddings.embed_documents(list(missing.values()))))
+            self.cache.put_many(vectors)
+            found.update(vectors)
+        return [found[key] for key in keys]
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        keys, found, missing = self._lookup("document", texts)
+        if missing:
+            with get_tracer().span("embeddings.documents", model=self.namespace, texts=len(missing), chars=sum(map(len, missing.values()))):
+                vectors = dict(zip(missing, await self.embeddings.aembed_documents(list(missing.values()))))
+            self.cache.put_many(vectors)
+            found.update(vectors)
+        return [found[key] for key in keys]
+
+    def embed_query(self, text: str) -> list[float]:
+        keys, found, missing = self._lookup("query", [text])
+        if missing:
+            found[keys[0]] = self.embeddings.embed_query(text)
+            self.cache.put_many({keys[0]: found[keys[0]]})
+        return found[keys[0]]
+
+    async def aembed_query(self, text: str) -> list[float]:
+        keys, found, missing = self._lookup("query", [text])
+        if missing:
+            with get_tracer().span("embeddings.query", model=self.namespace, chars=len(text)):
+                found[keys[0]] = await self.embeddings.aembed_query(text)
+            self.cache.put_many({keys[0]: found[keys[0]]})
+        return found[keys[0]]
+
+
+def _build_embedding_cache() -> EmbeddingCache:
+    return EmbeddingCache(
+        path=os.getenv("EMBEDDING_CACHE_PATH", "embedding_cache.sqlite") or None,
+        max_size=int(os.getenv("EMBEDDING_CACHE_SIZE", 2048)),
+        max_rows=int(os.getenv("EMBEDDING_CACHE_MAX_ROWS", 50000)),
+    )
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    return get_registry().get("embedding_cache", _build_embedding_cache, close=lambda cache: cache.close())
@@ -0,0 +1,88 @@
+import math
+import re
+import time
+from collections import Counter
+from langchain_core.documents import Document
+
+TOKEN_PATTERN = re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+|\w+")
+STOPWORDS = {
+    "a", "about", "an", "and", "any", "are", "as", "at", "be", "but", "by", "can", "did", "do", "does", "for", "from",
+    "has", "have", "he", "her", "his", "how", "i", "in", "is", "it", "its", "know", "me", "my", "of", "on", "or",
+    "our", "remember", "she", "so", "tell", "that", "the", "their", "them", "they", "this", "to", "us", "was", "we",
+    "were", "what", "when", "where", "which", "who", "with", "you", "your",
+}
+
+
+def tokenize(text: str) -> list[str]:
+    tokens = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        if token in STOPWORDS:
+            continue
+        # Plural and third-person "s" is the only stemming; enough for "loves" to match "love"
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss") and "@" not in token:
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+class LexicalIndex:
+    """
+    In-memory BM25 index over one namespace's memories.
+
+    search() also reports coverage: the share of the query's IDF weight that
+    a memory matches. Query terms no memory contains count at the highest
+    IDF, so sharing one word with a longer query never looks like a full
+    match. A coverage near 1 means the memory names everything distinctive
+    in the query, like a person, an email or a project.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.documents: dict[str, tuple[Document, Counter]] = {}
+        self.document_frequency: Counter = Counter()
+        self.total_length = 0
+        self.loaded_at = time.monotonic()
+
+    def add(self, ids: list[str], documents: list[str], metadatas: list[dict]):
+        for id, document, metadata in zip(ids, documents, metadatas):
+            self.remove([id])
+            terms = Counter(tokenize(document))
+            self.documents[id] = (Document(id=id, page_content=document, metadata=metadata), terms)
+            self.document_frequency.update(terms.keys())
+            self.total_length += sum(terms.values())
+
+    def remove(self, ids: list[str]):
+        for id in ids:
+            entry = self.documents.pop(id, None)
+            if entry is not None:
+                self.document_frequency.subtract(entry[1].keys())
+                self.total_length -= sum(entry[1].values())
+
+    def _idf(self, frequency: int) -> float:
+        return math.log(1 + (len(self.documents) - frequency + 0.5) / (frequency + 0.5))
+
+    def search(self, query: str, k: int) -> list[tuple[Document, float, float]]:
+        """Top k memories as (document, bm25 score, coverage), best first."""
+        query_terms = set(tokenize(query))
+        terms = [term for term in query_terms if self.document_frequency.get(term, 0) > 0]
+        if not terms:
+            return []
+        idf = {term: self._idf(self.document_frequency[term]) for term in terms}
+        # Unseen terms are as distinctive as a term can be; leaving them out would let one shared word cover the query
+        query_weight = sum(idf.values()) + self._idf(0) * (len(query_terms) - len(terms))
+        average_length = self.total_length / len(self.documents)
+
+        results = []
+        for document, frequencies in self.documents.values():
+            matched = [term for term in terms if term in frequencies]
+            if not matched:
+                continue
+            length = sum(frequencies.values())
+            score = sum(
+                idf[term] * frequencies[term] * (self.k1 + 1)
+                / (frequencies[term] + self.k1 * (1 - self.b + self.b * length / average_length))
+                for term in matched
+            )
+            results.append((document, score, sum(idf[term] for term in matched) / query_weight))
+        return sorted(results, key=lambda result: result[1], reverse=True)[:k]
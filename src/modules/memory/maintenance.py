@@ -0,0 +1,171 @@
+"""
+Memory maintenance: merges near-duplicate memories, evicts the least
+valuable ones past a per-user cap and compacts the store on disk.
+
+Runs incrementally in the background for namespaces that have had enough
+new writes, or offline over every namespace:
+
+    python -m src.modules.memory.maintenance [--namespace NAMESPACE] [--no-compact]
+"""
+import argparse
+import asyncio
+import math
+import os
+import threading
+from datetime import datetime
+import numpy as np
+from src.modules.memory.vector_backend import VectorBackend, get_vector_backend
+from src.modules.resources.resources import get_registry
+
+HALF_LIFE_DAYS = float(os.getenv("MEMORY_HALF_LIFE_DAYS", 30))
+# How much of a memory's retrieval score is subject to decay; the rest is pure similarity
+DECAY_WEIGHT = float(os.getenv("MEMORY_DECAY_WEIGHT", 0.3))
+
+
+def recency(metadata: dict, now: datetime) -> float:
+    """1.0 for a memory saved just now, halving every HALF_LIFE_DAYS."""
+    try:
+        saved_at = datetime.fromisoformat(metadata["timestamp"])
+    except (KeyError, TypeError, ValueError):
+        return 1.0
+    age_days = max((now - saved_at).total_seconds(), 0) / 86400
+    return 0.5 ** (age_days / HALF_LIFE_DAYS)
+
+
+def decayed_score(similarity: float, metadata: dict, now: datetime) -> float:
+    return similarity * (1 - DECAY_WEIGHT + DECAY_WEIGHT * recency(metadata, now))
+
+
+def memory_value(metadata: dict, now: datetime) -> float:
+    # Facts that kept coming up (and were merged) are worth more than one-offs of the same age
+    return recency(metadata, now) * (1 + math.log(metadata.get("merged_count", 1)))
+
+
+class MemoryMaintenance:
+    def __init__(self, backend: VectorBackend, merge_threshold: float = 0.7, max_per_namespace: int = 500, compact_every: int = 50):
+        self.backend = backend
+        self.merge_threshold = merge_threshold
+        self.max_per_namespace = max_per_namespace
+        self.compact_every = compact_every
+        self._writes: dict[str, int] = {}
+        self._running: set[str] = set()
+        self._lock = threading.Lock()
+        self.runs = 0
+        self.merged = 0
+        self.evicted = 0
+        self.bytes_reclaimed = 0
+
+    def record_writes(self, namespace: str, count: int) -> bool:
+        """Count new memories; True once the namespace is due for maintenance."""
+        with self._lock:
+            self._writes[namespace] = self._writes.get(namespace, 0) + count
+            if self._writes[namespace] < self.compact_every:
+                return False
+            self._writes[namespace] = 0
+            return True
+
+    async def amaintain_namespace(self, namespace: str) -> dict:
+        with self._lock:
+            if namespace in self._running:
+                return {"namespace": namespace, "merged": 0, "evicted": 0, "remaining": None}
+            self._running.add(namespace)
+        try:
+            ids, vectors, documents, metadatas = await self.backend.aget_all(namespace)
+            if not ids:
+                return {"namespace": namespace, "merged": 0, "evicted": 0, "remaining": 0}
+            now = datetime.now()
+
+            # Newest first, so each cluster keeps its most recent wording
+            order = sorted(range(len(ids)), key=lambda i: metadatas[i].get("timestamp", ""), reverse=True)
+            matrix = np.asarray([vectors[i] for i in order], dtype=np.float32)
+            matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+            similarity = matrix @ matrix.T
+
+            assigned = np.zeros(len(order), dtype=bool)
+            deleted, kept, merged_back = [], [], []
+            for position, i in enumerate(order):
+                if assigned[position]:
+                    continue
+                members = np.flatnonzero((similarity[position] > self.merge_threshold) & ~assigned)
+                assigned[members] = True
+                metadata = dict(metadatas[i])
+                if len(members) > 1:
+                    duplicates = [order[member] for member in members if member != position]
+                    deleted.extend(ids[j] for j in duplicates)
+                    metadata["merged_count"] = sum(metadatas[j].get("merged_count", 1) for j in [i, *duplicates])
+                    metadata["created_at"] = min(metadatas[j].get("created_at", metadatas[j].get("timestamp", "")) for j in [i, *duplicates])
+                    merged_back.append((ids[i], vectors[i], documents[i], metadata))
+                kept.append((i, metadata))
+
+            merged = len(deleted)
+            evicted = []
+            if len(kept) > self.max_per_namespace:
+                kept.sort(key=lambda item: memory_value(item[1], now), reverse=True)
+                evicted = [ids[i] for i, _ in kept[self.max_per_namespace:]]
+                evicted_set = set(evicted)
+                merged_back = [entry for entry in merged_back if entry[0] not in evicted_set]
+
+            # A merged memory is rewritten under its own id with the combined metadata
+            await self.backend.adelete(namespace, deleted + evicted + [entry[0] for entry in merged_back])
+            if merged_back:
+                await self.backend.aadd(namespace, *map(list, zip(*merged_back)))
+
+            with self._lock:
+                self.runs += 1
+                self.merged += merged
+                self.evicted += len(evicted)
+            return {"namespace": namespace, "merged": merged, "evicted": len(evicted), "remaining": len(kept) - len(evicted)}
+        finally:
+            with self._lock:
+                self._running.discard(namespace)
+
+    def compact(self) -> int:
+        reclaimed = self.backend.compact()
+        with self._lock:
+            self.bytes_reclaimed += reclaimed
+        return reclaimed
+
+    async def arun(self, namespaces: list[str] | None = None, compact: bool = True) -> list[dict]:
+        results = [await self.amaintain_namespace(namespace) for namespace in namespaces or self.backend.namespaces()]
+        if compact:
+            await asyncio.to_thread(self.compact)
+        return results
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "runs": self.runs,
+                "merged": self.merged,
+                "evicted": self.evicted,
+                "vectors_reclaimed": self.merged + self.evicted,
+                "bytes_reclaimed": self.bytes_reclaimed,
+            }
+
+
+def _build_memory_maintenance() -> MemoryMaintenance:
+    return MemoryMaintenance(
+        get_vector_backend(),
+        merge_threshold=float(os.getenv("MEMORY_MERGE_THRESHOLD", 0.7)),
+        max_per_namespace=int(os.getenv("MEMORY_MAX_PER_USER", 500)),
+        compact_every=int(os.getenv("MEMORY_COMPACT_EVERY", 50)),
+    )
+
+
+def get_memory_maintenance() -> MemoryMaintenance:
+    return get_registry().get("memory_maintenance", _build_memory_maintenance)
+
+
+async def amain(namespaces: list[str] | None, compact: bool):
+    maintenance = get_memory_maintenance()
+    for result in await maintenance.arun(namespaces, compact):
+        print(f"{result['namespace']}: merged {result['merged']}, evicted {result['evicted']}, {result['remaining']} remaining")
+    print(maintenance.stats())
+    await get_registry().ashutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Merge, evict and compact stored memories")
+    parser.add_argument("--namespace", action="append", help="Only maintain this namespace (repeatable)")
+    parser.add_argument("--no-compact", action="store_true", help="Skip compacting the store on disk")
+    args = parser.parse_args()
+    asyncio.run(amain(args.namespace, not args.no_compact))
@@ -0,0 +1,155 @@
+"""
+Local gate in front of the memory-analysis LLM call.
+
+Heuristics catch messages that state a personal fact (always analyzed) and
+messages that can't carry one, like requests without any first-person
+wording. Everything else goes to an optional naive Bayes classifier
+trained on logged MemoryAnalysis results, or to the LLM when there is no
+model. Messages scoring under the threshold skip the LLM call; lower the
+threshold to trade spend for recall.
+
+Log labelled messages by setting MEMORY_GATE_LOG, then train with:
+
+    python -m src.modules.memory.memory_gate --log memory_gate_log.jsonl --model memory_gate_model.json
+"""
+import argparse
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter
+from src.modules.resources.resources import get_registry
+
+PERSONAL_PATTERN = re.compile(r"\b(i|i'm|im|i've|i'd|i'll|my|mine|me|myself|we|we're|our|ours|us)\b")
+FACT_PATTERN = re.compile(
+    r"\b(i am|i'm|im|my name|call me|i live|i moved|i work|i study|i studied|i graduated|i love|i like|i hate|"
+    r"i prefer|i enjoy|favou?rite|remember|born|years old|my (wife|husband|partner|kids?|son|daughter|dog|cat|family|job|role|birthday))\b"
+)
+REQUEST_PATTERN = re.compile(
+    r"^(please\s+)?(show|list|get|give|create|add|open|make|file|assign|find|what|which|who|where|when|how|can you|could you)\b"
+)
+TOKEN_PATTERN = re.compile(r"[a-z']+")
+
+
+def _tokens(message: str) -> list[str]:
+    words = TOKEN_PATTERN.findall(message.lower())
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+class NaiveBayesGate:
+    """Two-class multinomial naive Bayes over word unigrams and bigrams."""
+
+    def __init__(self, class_counts: list[int], token_counts: dict[str, list[int]]):
+        self.class_counts = class_counts
+        self.token_counts = token_counts
+        self.totals = [sum(counts[label] for counts in token_counts.values()) for label in (0, 1)]
+
+    @classmethod
+    def train(cls, samples: list[tuple[str, bool]]) -> "NaiveBayesGate":
+        class_counts = [0, 0]
+        token_counts: dict[str, list[int]] = {}
+        for message, should_save in samples:
+            label = int(should_save)
+            class_counts[label] += 1
+            for token, count in Counter(_tokens(message)).items():
+                token_counts.setdefault(token, [0, 0])[label] += count
+        return cls(class_counts, token_counts)
+
+    @classmethod
+    def load(cls, path: str) -> "NaiveBayesGate":
+        with open(path) as file:
+            data = json.load(file)
+        return cls(data["class_counts"], data["token_counts"])
+
+    def save(self, path: str):
+        with open(path, "w") as file:
+            json.dump({"class_counts": self.class_counts, "token_counts": self.token_counts}, file)
+
+    def probability(self, message: str) -> float:
+        """Probability that the message holds something worth saving."""
+        vocabulary = len(self.token_counts) + 1
+        log_odds = math.log((self.class_counts[1] + 1) / (self.class_counts[0] + 1))
+        for token in _tokens(message):
+            counts = self.token_counts.get(token, [0, 0])
+            log_odds += math.log((counts[1] + 1) / (self.totals[1] + vocabulary))
+            log_odds -= math.log((counts[0] + 1) / (self.totals[0] + vocabulary))
+        return 1 / (1 + math.exp(-max(min(log_odds, 50), -50)))
+
+
+class MemoryGate:
+    def __init__(self, enabled: bool = True, threshold: float = 0.2, model: NaiveBayesGate | None = None, log_path: str | None = None):
+        self.enabled = enabled
+        self.threshold = threshold
+        self.model = model
+        self.log_path = log_path
+        self._lock = threading.Lock()
+        self.counters = Counter()
+
+    def score(self, message: str) -> tuple[float, str]:
+        text = message.lower().strip()
+        if FACT_PATTERN.search(text):
+            return 1.0, "fact_pattern"
+        if not PERSONAL_PATTERN.search(text):
+            return 0.0, "impersonal"
+        if self.model is not None:
+            return self.model.probability(text), "model"
+        if REQUEST_PATTERN.search(text):
+            return 0.1, "request"
+        return 0.5, "personal"
+
+    def should_analyze(self, message: str) -> bool:
+        if not self.enabled:
+            return True
+        score, reason = self.score(message)
+        analyze = score >= self.threshold
+        with self._lock:
+            self.counters["messages"] += 1
+            self.counters["llm_calls" if analyze else "llm_calls_avoided"] += 1
+            self.counters[f"{'passed' if analyze else 'skipped'}_{reason}"] += 1
+        return analyze
+
+    def record(self, message: str, should_save: bool):
+        # LLM verdicts become the training data for the classifier
+        if not self.log_path:
+            return
+        with self._lock, open(self.log_path, "a") as file:
+            file.write(json.dumps({"message": message, "should_save": should_save}) + "\n")
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"enabled": self.enabled, "threshold": self.threshold, "model": self.model is not None, **self.counters}
+
+
+def _build_memory_gate() -> MemoryGate:
+    model_path = os.getenv("MEMORY_GATE_MODEL")
+    return MemoryGate(
+        enabled=os.getenv("MEMORY_GATE", "true").lower() == "true",
+        threshold=float(os.getenv("MEMORY_GATE_THRESHOLD", 0.2)),
+        model=NaiveBayesGate.load(model_path) if model_path and os.path.exists(model_path) else None,
+        log_path=os.getenv("MEMORY_GATE_LOG"),
+    )
+
+
+def get_memory_gate() -> MemoryGate:
+    return get_registry().get("memory_gate", _build_memory_gate)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the memory gate classifier from logged MemoryAnalysis results")
+    parser.add_argument("--log", default=os.getenv("MEMORY_GATE_LOG", "memory_gate_log.jsonl"))
+    parser.add_argument("--model", default=os.getenv("MEMORY_GATE_MODEL", "memory_gate_model.json"))
+    args = parser.parse_args()
+
+    with open(args.log) as file:
+        samples = [(entry["message"], entry["should_save"]) for entry in map(json.loads, file) if entry.get("message")]
+    model = NaiveBayesGate.train(samples)
+    model.save(args.model)
+    threshold = float(os.getenv("MEMORY_GATE_THRESHOLD", 0.2))
+    gate = MemoryGate(threshold=threshold, model=model)
+    # Recall on the training log: how many savable messages would still reach the LLM
+    positives = [message for message, should_save in samples if should_save]
+    kept = sum(gate.score(message)[0] >= threshold for message in positives)
+    skipped = sum(gate.score(message)[0] < threshold for message, should_save in samples if not should_save)
+    print(f"Trained on {len(samples)} messages ({len(positives)} worth saving)")
+    print(f"At threshold {threshold}: recall {kept}/{len(positives)}, skips {skipped}/{len(samples) - len(positives)} of the rest")
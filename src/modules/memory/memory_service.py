@@ -1,11 +1,24 @@
-from langchain_chroma import Chroma
+import asyncio
+import os
+import threading
+import time
+from collections import Counter
 from langchain_google_genai import GoogleGenerativeAIEmbeddings, ChatGoogleGenerativeAI
 from uuid import uuid4
 from pydantic import BaseModel
 from src.graph.utils.prompts import MEMORY_ANALYSIS_PROMPT
 from typing import Optional
-from langchain_core.documents import Document
 from datetime import datetime
+from src.graph.utils.helpers import cosine_similarity
+from src.modules.memory.embedding_cache import get_embedding_cache
+from src.modules.memory.lexical import LexicalIndex, tokenize
+from src.modules.memory.maintenance import decayed_score, get_memory_maintenance
+from src.modules.memory.memory_gate import get_memory_gate
+from src.modules.memory.settings import get_memory_settings
+from src.modules.memory.vector_backend import DEFAULT_NAMESPACE, get_vector_backend
+from src.modules.resources.background import get_background_worker
+from src.modules.resources.resources import get_registry
+from src.modules.resources.tracing import get_tracer
 
 class MemoryAnalysis(BaseModel):
     memory_context: Optional[str] = None
@@ -13,66 +26,209 @@ class MemoryAnalysis(BaseModel):
 
 class MemoryService:
     def __init__(self):
-        self.embeddings = GoogleGenerativeAIEmbeddings(model="models/text-embedding-004")
-        self.vector_store = Chroma(
-            collection_name="user_memory",
-            collection_metadata={"hnsw:space": "cosine"},
-            create_collection_if_not_exists=True,
-            embedding_function=self.embeddings,
-            persist_directory="./chroma_db",  
+        self.embeddings = get_embedding_cache().wrap(
+            GoogleGenerativeAIEmbeddings(model="models/text-embedding-004"), namespace="text-embedding-004"
         )
-        self.llm = ChatGoogleGenerativeAI(model="gemini-2.0-flash")
-        self.COMPARE_MEMORY_THRESHOLD = 0.7
-        self.RETURN_MEMORY_THRESHOLD = 0.5
-
-    async def _find_similar_memory(self, message: str) -> bool:
-        results = await self.vector_store.asimilarity_search_with_relevance_scores(
-            message,
-            k=1
-        )
-        if not results or len(results) == 0:
-            return False
-        _, similarity_score = results[0]
-        return similarity_score > self.COMPARE_MEMORY_THRESHOLD
+        self.backend = get_vector_backend()
+        self.llm = ChatGoogleGenerativeAI(model="gemini-2.0-flash", callbacks=[get_tracer().callback_handler])
+        self.settings = get_memory_settings()
+        self.prefetch_enabled = os.getenv("MEMORY_PREFETCH", "true").lower() == "true"
+        self._prefetches: dict[tuple[str, str], asyncio.Task] = {}
+        self.write_batch_size = int(os.getenv("MEMORY_WRITE_BATCH_SIZE", 8))
+        self.write_delay = float(os.getenv("MEMORY_WRITE_DELAY", 2.0))
+        self._pending_writes: list[tuple[str, str, dict]] = []
+        self._flush_scheduled = False
+        self._write_lock = threading.Lock()
+        self._lexical: dict[str, LexicalIndex] = {}
+        self._lexical_lock = threading.Lock()
+        self.retrievals = Counter()
 
     async def _pick_possible_memory(self, message: str) -> MemoryAnalysis:
         prompt = MEMORY_ANALYSIS_PROMPT.format(message=message)
         response = await self.llm.with_structured_output(MemoryAnalysis).ainvoke(prompt)
         return response
     
-    def _get_all_memories(self) -> list[Document]:
-        return self.vector_store.get()
-
-    async def extract_and_save_memory(self, message: str):
-        memory_analysis = await self._pick_possible_memory(message)
+    async def extract_and_save_memory(self, message: str, namespace: str | None = None):
+        gate = get_memory_gate()
+        if not gate.should_analyze(message):
+            get_tracer().count("memory_gate", result="skipped")
+            return
+        get_tracer().count("memory_gate", result="analyzed")
+        with get_tracer().span("memory.analysis", message_chars=len(message)) as span:
+            memory_analysis = await self._pick_possible_memory(message)
+            span.set(should_save=memory_analysis.should_save)
+        gate.record(message, memory_analysis.should_save and bool(memory_analysis.memory_context))
         if memory_analysis.should_save and memory_analysis.memory_context:
-            similar_memory = await self._find_similar_memory(memory_analysis.memory_context)
-            if similar_memory:
-                print("Same memory found")
-            else:
-                document_1 = Document(
-                    page_content=memory_analysis.memory_context,
-                    metadata={"timestamp": datetime.now().isoformat()},
-                    id=1,
+            await self._abuffer_memory(namespace or DEFAULT_NAMESPACE, memory_analysis.memory_context, {"timestamp": datetime.now().isoformat()})
+        else:
+            get_tracer().count("memory_skipped")
+
+    async def _abuffer_memory(self, namespace: str, memory: str, metadata: dict):
+        # Write-behind: memories are embedded, deduplicated and stored in batches
+        with self._write_lock:
+            self._pending_writes.append((namespace, memory, metadata))
+            flush_now = len(self._pending_writes) >= self.write_batch_size
+            schedule = not flush_now and not self._flush_scheduled
+            if schedule:
+                self._flush_scheduled = True
+        if flush_now:
+            await self.aflush()
+        elif schedule:
+            get_background_worker().submit(self._aflush_later(), name="flush_memories")
+
+    async def _aflush_later(self):
+        await asyncio.sleep(self.write_delay)
+        await self.aflush()
+
+    async def aflush(self):
+        with self._write_lock:
+            pending, self._pending_writes = self._pending_writes, []
+            self._flush_scheduled = False
+        if not pending:
+            return
+
+        get_tracer().count("memory_flushes")
+        get_tracer().count("memory_flushed", len(pending))
+        # One embedding request serves both the duplicate check and the insert, for every namespace in the batch
+        vectors = await self.embeddings.aembed_documents([memory for _, memory, _ in pending])
+        by_namespace: dict[str, list[tuple[str, dict, list[float]]]] = {}
+        for (namespace, memory, metadata), vector in zip(pending, vectors):
+            by_namespace.setdefault(namespace, []).append((memory, metadata, vector))
+
+        for namespace, entries in by_namespace.items():
+            with get_tracer().span("vector.search", namespace=namespace, vectors=len(entries), k=1):
+                nearest = await self.backend.asearch(namespace, [vector for _, _, vector in entries], k=1)
+            ids, documents, metadatas, kept_vectors = [], [], [], []
+            for (memory, metadata, vector), matches in zip(entries, nearest):
+                duplicate = any(score > self.settings.compare_threshold for _, score in matches) or any(
+                    cosine_similarity(vector, kept) > self.settings.compare_threshold for kept in kept_vectors
                 )
-                documents = [
-                    document_1,
-                ]
-                uuids = [str(uuid4()) for _ in range(len(documents))]
+                if duplicate:
+                    get_tracer().event("memory_duplicate", namespace=namespace)
+                    get_tracer().count("memory_duplicates")
+                    continue
+                ids.append(str(uuid4()))
+                documents.append(memory)
+                metadatas.append(metadata)
+                kept_vectors.append(vector)
 
-                await self.vector_store.aadd_documents(documents=documents, ids=uuids)
-        else:
-            print("Memory not saved")
-
-    async def get_relevant_memories(self, message: str) -> str:
-        memories = await self.vector_store.asimilarity_search_with_relevance_scores(message, k=3)
-        filtered_memories = [(doc, score) for doc, score in memories if score > self.RETURN_MEMORY_THRESHOLD]
-        
-        if filtered_memories:
-            return "\n".join(f"- {doc.page_content}" for doc, _ in filtered_memories)
-        else:
-            return None
+            if ids:
+                with get_tracer().span("vector.add", namespace=namespace, vectors=len(ids), bytes=sum(map(len, documents))):
+                    await self.backend.aadd(namespace, ids, kept_vectors, documents, metadatas)
+                with self._lexical_lock:
+                    if namespace in self._lexical:
+                        self._lexical[namespace].add(ids, documents, metadatas)
+                # Merging and eviction run once a namespace has had enough new memories, off the write path
+                if get_memory_maintenance().record_writes(namespace, len(ids)):
+                    get_background_worker().submit(self._amaintain(namespace), name="maintain_memories")
+
+    async def _amaintain(self, namespace: str):
+        await get_memory_maintenance().amaintain_namespace(namespace)
+        with self._lexical_lock:
+            self._lexical.pop(namespace, None)
+
+    async def _alexical_index(self, namespace: str) -> LexicalIndex:
+        with self._lexical_lock:
+            index = self._lexical.get(namespace)
+        if index is None or time.monotonic() - index.loaded_at > self.settings.lexical_refresh:
+            with get_tracer().span("vector.get_all", namespace=namespace) as span:
+                ids, _, documents, metadatas = await self.backend.aget_all(namespace)
+                span.set(vectors=len(ids))
+            index = LexicalIndex()
+            index.add(ids, documents, metadatas)
+            with self._lexical_lock:
+                self._lexical[namespace] = index
+        return index
+
+    def stats(self) -> dict:
+        return {
+            "pending_writes": len(self._pending_writes),
+            "embeddings": get_embedding_cache().stats(),
+            "maintenance": get_memory_maintenance().stats(),
+            "gate": get_memory_gate().stats(),
+            "retrieval": dict(self.retrievals),
+        }
+
+    def prefetch_relevant_memories(self, message: str, namespace: str | None = None):
+        key = (namespace or DEFAULT_NAMESPACE, message)
+        if not self.prefetch_enabled or key in self._prefetches:
+            return
+        self._prefetches = {key: task for key, task in self._prefetches.items() if not task.done()}
+        self._prefetches[key] = asyncio.create_task(self._search_relevant_memories(*key))
+
+    def cancel_prefetch(self, message: str, namespace: str | None = None):
+        task = self._prefetches.pop((namespace or DEFAULT_NAMESPACE, message), None)
+        if task is not None:
+            task.cancel()
+
+    async def get_relevant_memories(self, message: str, namespace: str | None = None) -> str:
+        key = (namespace or DEFAULT_NAMESPACE, message)
+        task = self._prefetches.pop(key, None)
+        if task is not None and task.get_loop() is asyncio.get_running_loop():
+            return await task
+        return await self._search_relevant_memories(*key)
+
+    async def _search_relevant_memories(self, namespace: str, message: str) -> str:
+        with get_tracer().span("memory.retrieve", namespace=namespace) as span:
+            settings = self.settings
+            index = await self._alexical_index(namespace)
+            with self._lexical_lock:
+                lexical_hits = index.search(message, settings.retrieval_candidates)
+
+            # (document, vector similarity, keyword coverage) per memory id
+            candidates = {doc.id: (doc, 0.0, coverage) for doc, _, coverage in lexical_hits}
+            if lexical_hits and lexical_hits[0][2] >= settings.lexical_threshold:
+                # A memory names everything distinctive in the message; no need to embed it
+                self.retrievals["lexical_only"] += 1
+                get_tracer().count("memory_retrievals", mode="lexical_only")
+            else:
+                self.retrievals["hybrid" if lexical_hits else "vector"] += 1
+                get_tracer().count("memory_retrievals", mode="hybrid" if lexical_hits else "vector")
+                vector = await self.embeddings.aembed_query(message)
+                with get_tracer().span("vector.search", namespace=namespace, vectors=1, k=settings.retrieval_candidates):
+                    vector_hits = (await self.backend.asearch(namespace, [vector], k=settings.retrieval_candidates))[0]
+                for doc, similarity in vector_hits:
+                    coverage = candidates.get(doc.id, (None, 0.0, 0.0))[2]
+                    candidates[doc.id] = (doc, similarity, coverage)
+
+            # Older memories lose part of their score, so more candidates are fetched than returned
+            now = datetime.now()
+            scored_memories = [
+                (doc, decayed_score((1 - settings.lexical_weight) * similarity + settings.lexical_weight * coverage, doc.metadata, now))
+                for doc, similarity, coverage in candidates.values()
+                if decayed_score(similarity, doc.metadata, now) > settings.return_threshold or coverage >= settings.lexical_threshold
+            ]
+            filtered_memories = self._rerank(scored_memories, settings.retrieval_k)
+            span.set(candidates=len(candidates), returned=len(filtered_memories))
+
+            if filtered_memories:
+                return "\n".join(f"- {doc.page_content}" for doc, _ in filtered_memories)
+            else:
+                return None
+
+    def _rerank(self, scored_memories: list, k: int) -> list:
+        scored_memories = sorted(scored_memories, key=lambda item: item[1], reverse=True)
+        if not self.settings.mmr:
+            return scored_memories[:k]
+
+        # MMR over token overlap: the backends don't hand back stored vectors, and maintenance already merges
+        # memories that are close in embedding space, so what's left to catch is mostly rewording
+        terms = {doc.id: set(tokenize(doc.page_content)) for doc, _ in scored_memories}
+        def overlap(item):
+            return max(
+                (len(terms[item[0].id] & terms[doc.id]) / max(len(terms[item[0].id] | terms[doc.id]), 1) for doc, _ in selected),
+                default=0.0,
+            )
+
+        selected = []
+        while scored_memories and len(selected) < k:
+            best = max(scored_memories, key=lambda item: self.settings.mmr_lambda * item[1] - (1 - self.settings.mmr_lambda) * overlap(item))
+            scored_memories.remove(best)
+            # Near-restatements of a memory already picked are dropped rather than just ranked lower
+            if overlap(best) < 0.8:
+                selected.append(best)
+        return selected
 
 
 def get_memory_manager() -> MemoryService:
-    return MemoryService()
+    return get_registry().get("memory_service", MemoryService)
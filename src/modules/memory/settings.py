@@ -0,0 +1,29 @@
+from pydantic_settings import BaseSettings, SettingsConfigDict
+from src.modules.resources.resources import get_registry
+
+
+class MemorySettings(BaseSettings):
+    """Memory retrieval and deduplication settings, read from MEMORY_* environment variables."""
+
+    model_config = SettingsConfigDict(env_prefix="MEMORY_")
+
+    # Similarity above which a new memory counts as already stored
+    compare_threshold: float = 0.7
+    # Vector similarity (after decay) a memory needs to be returned
+    return_threshold: float = 0.5
+    retrieval_k: int = 3
+    # Candidates each retriever returns before fusion and re-ranking
+    retrieval_candidates: int = 6
+    # Keyword coverage at which a memory is returned without embedding the query
+    lexical_threshold: float = 0.8
+    # Share of the fused score that comes from keyword coverage
+    lexical_weight: float = 0.3
+    # Seconds before a namespace's keyword index is rebuilt, picking up other processes' writes
+    lexical_refresh: float = 300
+    mmr: bool = True
+    # 1.0 ranks purely by relevance; lower values favor memories unlike those already picked
+    mmr_lambda: float = 0.7
+
+
+def get_memory_settings() -> MemorySettings:
+    return get_registry().get("memory_settings", MemorySettings)
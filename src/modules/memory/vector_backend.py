@@ -0,0 +1,313 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from array import array
+import chromadb
+import numpy as np
+from langchain_core.documents import Document
+from src.modules.resources.resources import get_registry
+from src.modules.resources.tracing import get_tracer
+
+DEFAULT_NAMESPACE = "default"
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS memories (
+        id TEXT PRIMARY KEY,
+        namespace TEXT NOT NULL,
+        document TEXT NOT NULL,
+        metadata TEXT,
+        vector BLOB NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS memories_namespace ON memories (namespace);
+"""
+
+
+class VectorBackend:
+    """
+    Where memory vectors live. Every call is scoped to a namespace (a user
+    or team), so a search only ever looks at that tenant's memories.
+    Scores are cosine similarities, higher meaning closer.
+    """
+
+    async def asearch(self, namespace: str, vectors: list[list[float]], k: int) -> list[list[tuple[Document, float]]]:
+        raise NotImplementedError
+
+    async def aadd(self, namespace: str, ids: list[str], vectors: list[list[float]], documents: list[str], metadatas: list[dict]):
+        raise NotImplementedError
+
+    def count(self, namespace: str) -> int:
+        raise NotImplementedError
+
+    async def aget_all(self, namespace: str) -> tuple[list[str], list[list[float]], list[str], list[dict]]:
+        # (ids, vectors, documents, metadatas) of every memory in the namespace
+        raise NotImplementedError
+
+    async def adelete(self, namespace: str, ids: list[str]):
+        raise NotImplementedError
+
+    def namespaces(self) -> list[str]:
+        raise NotImplementedError
+
+    def compact(self) -> int:
+        # Reclaims disk space freed by deletes; returns the bytes reclaimed
+        return 0
+
+    def close(self):
+        pass
+
+
+def _size(path: str) -> int:
+    if os.path.isfile(path):
+        return sum(os.path.getsize(file) for file in (path, path + "-wal") if os.path.exists(file))
+    return sum(os.path.getsize(os.path.join(root, file)) for root, _, files in os.walk(path) for file in files)
+
+
+class ChromaBackend(VectorBackend):
+    """One Chroma collection per namespace, so each tenant gets its own HNSW index."""
+
+    def __init__(self, path: str = "./chroma_db"):
+        self.path = path
+        self.client = chromadb.PersistentClient(path=path)
+        self._collections: dict[str, chromadb.Collection] = {}
+        self._lock = threading.Lock()
+
+    def _collection(self, namespace: str) -> chromadb.Collection:
+        collection = self._collections.get(namespace)
+        if collection is None:
+            with self._lock:
+                collection = self._collections.get(namespace)
+                if collection is None:
+                    # The default namespace keeps the collection memories were stored in before namespaces existed;
+                    # others are hashed since collection names only allow a few characters
+                    name = "user_memory" if namespace == DEFAULT_NAMESPACE else f"user_memory_{hashlib.sha1(namespace.encode()).hexdigest()[:16]}"
+                    collection = self.client.get_or_create_collection(name, metadata={"hnsw:space": "cosine", "namespace": namespace})
+                    self._collections[namespace] = collection
+        return collection
+
+    def _search(self, namespace: str, vectors: list[list[float]], k: int) -> list[list[tuple[Document, float]]]:
+        results = self._collection(namespace).query(
+            query_embeddings=vectors,
+            n_results=k,
+            include=["documents", "metadatas", "distances"],
+        )
+        return [
+            [
+                (Document(id=id, page_content=document, metadata=metadata or {}), 1.0 - distance)
+                for id, document, metadata, distance in zip(ids, documents, metadatas, distances)
+            ]
+            for ids, documents, metadatas, distances in zip(results["ids"], results["documents"], results["metadatas"], results["distances"])
+        ]
+
+    async def asearch(self, namespace: str, vectors: list[list[float]], k: int) -> list[list[tuple[Document, float]]]:
+        return await asyncio.to_thread(self._search, namespace, vectors, k)
+
+    async def aadd(self, namespace: str, ids: list[str], vectors: list[list[float]], documents: list[str], metadatas: list[dict]):
+        await asyncio.to_thread(
+            self._collection(namespace).add, ids=ids, embeddings=vectors, documents=documents, metadatas=metadatas
+        )
+
+    def count(self, namespace: str) -> int:
+        return self._collection(namespace).count()
+
+    async def aget_all(self, namespace: str) -> tuple[list[str], list[list[float]], list[str], list[dict]]:
+        results = await asyncio.to_thread(self._collection(namespace).get, include=["embeddings", "documents", "metadatas"])
+        vectors = [list(map(float, vector)) for vector in results["embeddings"]]
+        return results["ids"], vectors, results["documents"], [metadata or {} for metadata in results["metadatas"]]
+
+    async def adelete(self, namespace: str, ids: list[str]):
+        if ids:
+            await asyncio.to_thread(self._collection(namespace).delete, ids=ids)
+
+    def namespaces(self) -> list[str]:
+        namespaces = []
+        for collection in self.client.list_collections():
+            if collection.name == "user_memory":
+                namespaces.append(DEFAULT_NAMESPACE)
+            elif collection.name.startswith("user_memory_") and (collection.metadata or {}).get("namespace"):
+                namespaces.append(collection.metadata["namespace"])
+        return namespaces
+
+    def compact(self) -> int:
+        # Chroma compacts its own HNSW segments; what's left is the free pages deletes leave in its SQLite file
+        database = os.path.join(self.path, "chroma.sqlite3")
+        if not os.path.exists(database):
+            return 0
+        before = _size(self.path)
+        try:
+            with sqlite3.connect(database, timeout=5) as connection:
+                connection.execute("VACUUM")
+        except sqlite3.OperationalError as e:
+            get_tracer().event("compact_failed", database=database, error=str(e))
+            get_tracer().count("compact_failures")
+        return max(before - _size(self.path), 0)
+
+
+class _LocalIndex:
+    """
+    One namespace's vectors. Searched by brute force with NumPy while small,
+    and through an HNSW graph once it passes hnsw_threshold (if hnswlib is
+    installed).
+    """
+
+    def __init__(self, hnsw_threshold: int):
+        self.hnsw_threshold = hnsw_threshold
+        self.ids: list[str] = []
+        self.documents: list[str] = []
+        self.metadatas: list[dict] = []
+        self.matrix: np.ndarray | None = None
+        self.hnsw = None
+
+    def add(self, ids: list[str], vectors: list[list[float]], documents: list[str], metadatas: list[dict]):
+        rows = np.asarray(vectors, dtype=np.float32)
+        # Normalized once here, so cosine similarity is a dot product at query time
+        rows /= np.maximum(np.linalg.norm(rows, axis=1, keepdims=True), 1e-12)
+        start = len(self.ids)
+        self.matrix = rows if self.matrix is None else np.vstack([self.matrix, rows])
+        self.ids.extend(ids)
+        self.documents.extend(documents)
+        self.metadatas.extend(metadatas)
+
+        if self.hnsw is not None:
+            if self.hnsw.get_max_elements() < len(self.ids):
+                self.hnsw.resize_index(len(self.ids) * 2)
+            self.hnsw.add_items(rows, np.arange(start, len(self.ids)))
+        elif len(self.ids) >= self.hnsw_threshold:
+            self._build_hnsw()
+
+    def _build_hnsw(self):
+        try:
+            import hnswlib
+        except ImportError:
+            # Stay on brute force rather than retrying the import on every add
+            self.hnsw_threshold = float("inf")
+            return
+        self.hnsw = hnswlib.Index(space="ip", dim=self.matrix.shape[1])
+        self.hnsw.init_index(max_elements=len(self.ids) * 2, ef_construction=200, M=16)
+        self.hnsw.add_items(self.matrix, np.arange(len(self.ids)))
+
+    def search(self, vector: list[float], k: int) -> list[tuple[Document, float]]:
+        if self.matrix is None:
+            return []
+        query = np.asarray(vector, dtype=np.float32)
+        query /= max(np.linalg.norm(query), 1e-12)
+        k = min(k, len(self.ids))
+
+        if self.hnsw is not None:
+            self.hnsw.set_ef(max(50, k))
+            labels, distances = self.hnsw.knn_query(query, k=k)
+            # hnswlib's inner-product distance is 1 - dot
+            hits = zip(labels[0], 1.0 - distances[0])
+        else:
+            scores = self.matrix @ query
+            top = np.argpartition(-scores, k - 1)[:k]
+            hits = ((i, scores[i]) for i in top[np.argsort(-scores[top])])
+
+        return [(Document(id=self.ids[i], page_content=self.documents[i], metadata=self.metadatas[i]), float(score)) for i, score in hits]
+
+
+class LocalBackend(VectorBackend):
+    """
+    In-process vector index, persisted to a SQLite file and loaded one
+    namespace at a time on first use. Avoids the Chroma client entirely,
+    but each process only sees the writes it made since loading, so it
+    suits a single server process.
+    """
+
+    def __init__(self, path: str, hnsw_threshold: int = 5000):
+        self.path = path
+        self.hnsw_threshold = hnsw_threshold
+        self._indexes: dict[str, _LocalIndex] = {}
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def _index(self, namespace: str) -> _LocalIndex:
+        index = self._indexes.get(namespace)
+        if index is None:
+            index = _LocalIndex(self.hnsw_threshold)
+            rows = self._connection.execute(
+                "SELECT id, document, metadata, vector FROM memories WHERE namespace = ?", (namespace,)
+            ).fetchall()
+            if rows:
+                index.add(
+                    [row[0] for row in rows],
+                    [array("f", row[3]).tolist() for row in rows],
+                    [row[1] for row in rows],
+                    [json.loads(row[2]) if row[2] else {} for row in rows],
+                )
+            self._indexes[namespace] = index
+        return index
+
+    async def asearch(self, namespace: str, vectors: list[list[float]], k: int) -> list[list[tuple[Document, float]]]:
+        with self._lock:
+            index = self._index(namespace)
+            return [index.search(vector, k) for vector in vectors]
+
+    async def aadd(self, namespace: str, ids: list[str], vectors: list[list[float]], documents: list[str], metadatas: list[dict]):
+        with self._lock:
+            # Loaded before the insert, or a first add would be read back from SQLite and then appended again
+            index = self._index(namespace)
+            with self._connection:
+                self._connection.executemany(
+                    "INSERT INTO memories (id, namespace, document, metadata, vector) VALUES (?, ?, ?, ?, ?)",
+                    [
+                        (id, namespace, document, json.dumps(metadata), array("f", vector).tobytes())
+                        for id, vector, document, metadata in zip(ids, vectors, documents, metadatas)
+                    ],
+                )
+            index.add(ids, vectors, documents, metadatas)
+
+    def count(self, namespace: str) -> int:
+        with self._lock:
+            return len(self._index(namespace).ids)
+
+    async def aget_all(self, namespace: str) -> tuple[list[str], list[list[float]], list[str], list[dict]]:
+        with self._lock:
+            index = self._index(namespace)
+            vectors = index.matrix.tolist() if index.matrix is not None else []
+            return list(index.ids), vectors, list(index.documents), list(index.metadatas)
+
+    async def adelete(self, namespace: str, ids: list[str]):
+        if not ids:
+            return
+        with self._lock:
+            with self._connection:
+                self._connection.executemany("DELETE FROM memories WHERE id = ?", [(id,) for id in ids])
+            # Rebuilt from SQLite on next use; cheaper than removing rows from the matrix and HNSW graph in place
+            self._indexes.pop(namespace, None)
+
+    def namespaces(self) -> list[str]:
+        with self._lock:
+            return [row[0] for row in self._connection.execute("SELECT DISTINCT namespace FROM memories")]
+
+    def compact(self) -> int:
+        with self._lock:
+            before = _size(self.path)
+            self._connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self._connection.execute("VACUUM")
+            return max(before - _size(self.path), 0)
+
+
+def _build_vector_backend() -> VectorBackend:
+    backend = os.getenv("MEMORY_BACKEND", "chroma")
+    if backend == "local":
+        return LocalBackend(
+            os.getenv("MEMORY_LOCAL_PATH", "memory_index.sqlite"),
+            hnsw_threshold=int(os.getenv("MEMORY_HNSW_THRESHOLD", 5000)),
+        )
+    if backend == "chroma":
+        return ChromaBackend(os.getenv("MEMORY_CHROMA_PATH", "./chroma_db"))
+    raise Exception(f"Unknown MEMORY_BACKEND: {backend}")
+
+
+def get_vector_backend() -> VectorBackend:
+    return get_registry().get("vector_backend", _build_vector_backend, close=lambda backend: backend.close())
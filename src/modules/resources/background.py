@@ -0,0 +1,176 @@
+import asyncio
+import atexit
+import os
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Coroutine
+from src.modules.resources.resources import get_registry
+
+
+class BackgroundWorker:
+    """
+    Long-lived event loop on a daemon thread, plus tracking for fire-and-forget jobs.
+
+    Synchronous callers (the Streamlit script thread, sync client wrappers) run
+    coroutines on this loop, so loop-bound clients and connection pools survive
+    across calls. Jobs submitted with submit() are kept alive until they finish,
+    are visible through stats(), and are drained before the process exits.
+    """
+
+    def __init__(self, drain_timeout: float | None = None, max_pending: int | None = None):
+        self.drain_timeout = drain_timeout if drain_timeout is not None else float(os.getenv("BACKGROUND_DRAIN_TIMEOUT", 10.0))
+        self.max_pending = max_pending or int(os.getenv("BACKGROUND_MAX_PENDING", 100))
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.dropped = 0
+        self.cancelled = 0
+        self._jobs: dict[asyncio.Task, tuple[str, float]] = {}
+        # Jobs handed to the worker loop that haven't become tasks yet
+        self._starting = 0
+        self._condition = threading.Condition()
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="background-worker", daemon=True)
+        self._thread.start()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        return self._loop
+
+    def spawn(self, coro: Coroutine) -> Future:
+        """Start a coroutine on the worker loop and return a future for its result."""
+        if self._loop.is_closed():
+            coro.close()
+            raise RuntimeError("Background worker is shut down")
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def run(self, coro: Coroutine, timeout: float | None = None) -> Any:
+        """Run a coroutine on the worker loop and block until it returns."""
+        if threading.current_thread() is self._thread:
+            coro.close()
+            raise RuntimeError("run() cannot be called from the worker's own event loop")
+        return self.spawn(coro).result(timeout)
+
+    def submit(self, coro: Coroutine, name: str = "job") -> bool:
+        """
+        Schedule a fire-and-forget job. From inside a running loop the job runs
+        on that loop, so it can use the caller's loop-bound clients; from plain
+        threads it runs on the worker loop. Returns False if the job was dropped.
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+
+        with self._condition:
+            if len(self._jobs) + self._starting >= self.max_pending:
+                self.dropped += 1
+                coro.close()
+                print(f"Background queue full, dropped {name} job")
+                return False
+            self.submitted += 1
+            if loop is None:
+                self._starting += 1
+
+        if loop is not None:
+            self._track(loop.create_task(coro, name=name), name)
+        else:
+            async def start():
+                self._track(asyncio.current_task(), name)
+                with self._condition:
+                    self._starting -= 1
+                return await coro
+            asyncio.run_coroutine_threadsafe(start(), self._loop)
+        return True
+
+    def _track(self, task: asyncio.Task, name: str):
+        with self._condition:
+            self._jobs[task] = (name, time.monotonic())
+        task.add_done_callback(self._on_done)
+
+    def _on_done(self, task: asyncio.Task):
+        with self._condition:
+            name, _ = self._jobs.pop(task, ("job", 0.0))
+            if task.cancelled():
+                self.cancelled += 1
+            elif task.exception() is not None:
+                self.failed += 1
+                print(f"Background {name} job failed: {task.exception()}")
+            else:
+                self.completed += 1
+            self._condition.notify_all()
+
+    def pending(self) -> list[dict]:
+        now = time.monotonic()
+        with self._condition:
+            return [{"name": name, "age": round(now - started_at, 1)} for name, started_at in self._jobs.values()]
+
+    def drain(self, timeout: float | None = None) -> int:
+        """Wait for pending jobs, cancel whatever is still running at the timeout and return how many were cancelled."""
+        timeout = self.drain_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while (self._jobs or self._starting) and time.monotonic() < deadline:
+                self._condition.wait(deadline - time.monotonic())
+            leftovers = list(self._jobs)
+
+        for task in leftovers:
+            loop = task.get_loop()
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(task.cancel)
+        if leftovers:
+            print(f"Cancelled {len(leftovers)} background jobs still running after {timeout:.0f}s")
+        return len(leftovers)
+
+    async def adrain(self, timeout: float | None = None) -> int:
+        """
+        drain() for code running on an event loop: waits for the jobs on the
+        current loop without blocking it, then cancels the rest.
+        """
+        timeout = self.drain_timeout if timeout is None else timeout
+        loop = asyncio.get_running_loop()
+        with self._condition:
+            tasks = [task for task in self._jobs if task.get_loop() is loop]
+        if not tasks:
+            return 0
+        _, leftovers = await asyncio.wait(tasks, timeout=timeout)
+        for task in leftovers:
+            task.cancel()
+        if leftovers:
+            await asyncio.gather(*leftovers, return_exceptions=True)
+            print(f"Cancelled {len(leftovers)} background jobs still running after {timeout:.0f}s")
+        return len(leftovers)
+
+    def shutdown(self, timeout: float | None = None):
+        if self._loop.is_closed():
+            return
+        self.drain(timeout)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    def stats(self) -> dict:
+        with self._condition:
+            return {
+                "pending": len(self._jobs) + self._starting,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "cancelled": self.cancelled,
+                "dropped": self.dropped,
+            }
+
+
+def get_background_worker() -> BackgroundWorker:
+    return get_registry().get("background_worker", BackgroundWorker, close=lambda worker: worker.shutdown())
+
+
+def drain_background_jobs():
+    # Registered after the registry's own atexit hook, so it runs first: jobs finish while their clients are still open
+    registry = get_registry()
+    if registry.has("background_worker"):
+        get_background_worker().drain()
+
+
+atexit.register(drain_background_jobs)
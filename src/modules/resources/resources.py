@@ -0,0 +1,71 @@
+import asyncio
+import atexit
+import threading
+from typing import Any, Callable
+
+
+class ResourceRegistry:
+    """
+    Lazily constructs shared clients once per process and tears them down on shutdown.
+
+    Construction happens under a lock and never awaits, so the same registry is
+    safe to use from worker threads and from coroutines on any event loop.
+    """
+
+    def __init__(self):
+        self._resources: dict[str, Any] = {}
+        self._closers: list[tuple[str, Callable[[Any], Any]]] = []
+        self._lock = threading.RLock()
+
+    def get(self, name: str, factory: Callable[[], Any], close: Callable[[Any], Any] | None = None) -> Any:
+        resource = self._resources.get(name)
+        if resource is not None:
+            return resource
+        with self._lock:
+            resource = self._resources.get(name)
+            if resource is None:
+                resource = factory()
+                self._resources[name] = resource
+                if close is not None:
+                    self._closers.append((name, close))
+        return resource
+
+    def has(self, name: str) -> bool:
+        return name in self._resources
+
+    def names(self) -> list[str]:
+        return list(self._resources)
+
+    async def ashutdown(self):
+        with self._lock:
+            resources, self._resources = self._resources, {}
+            closers, self._closers = self._closers, []
+        for name, close in reversed(closers):
+            try:
+                result = close(resources[name])
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception as e:
+                print(f"Error closing resource {name}: {e}")
+
+    def shutdown(self):
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            asyncio.run(self.ashutdown())
+            return
+        raise RuntimeError("shutdown() called from a running event loop, await ashutdown() instead")
+
+
+_registry = ResourceRegistry()
+
+
+def get_registry() -> ResourceRegistry:
+    return _registry
+
+
+def shutdown_resources():
+    _registry.shutdown()
+
+
+atexit.register(shutdown_resources)
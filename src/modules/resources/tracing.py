@@ -0,0 +1,313 @@
+import bisect
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any
+from uuid import UUID
+from langchain_core.callbacks import BaseCallbackHandler
+from src.modules.resources.resources import get_registry
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+QUANTILES = (0.5, 0.95, 0.99)
+
+_current_span: contextvars.ContextVar["Span | None"] = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    def __init__(self, name: str, parent: "Span | None", attributes: dict):
+        self.name = name
+        self.trace_id = parent.trace_id if parent else os.urandom(16).hex()
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent.span_id if parent else None
+        self.start_ns = time.time_ns()
+        self.end_ns: int | None = None
+        self.attributes = attributes
+        self.events: list[tuple[int, str, dict]] = []
+        self.error: str | None = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def add_event(self, name: str, **attributes):
+        self.events.append((time.time_ns(), name, attributes))
+
+    @property
+    def duration(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e9
+
+
+def _otlp_value(value: Any) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: dict) -> list[dict]:
+    return [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items() if value is not None]
+
+
+def _label(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+class _SpanMetrics:
+    def __init__(self, reservoir_size: int):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+        # Percentiles come from the most recent durations, so they follow the current behaviour
+        self.recent: deque[float] = deque(maxlen=reservoir_size)
+
+    def observe(self, duration: float, error: bool):
+        self.count += 1
+        self.errors += int(error)
+        self.total += duration
+        index = bisect.bisect_left(LATENCY_BUCKETS, duration)
+        if index < len(self.buckets):
+            self.buckets[index] += 1
+        self.recent.append(duration)
+
+    def quantiles(self) -> dict[float, float]:
+        ordered = sorted(self.recent)
+        if not ordered:
+            return {}
+        return {quantile: ordered[min(int(quantile * len(ordered)), len(ordered) - 1)] for quantile in QUANTILES}
+
+
+class Tracer:
+    """
+    Spans around graph nodes and external calls (LLM, embeddings, vector
+    store, Linear), with per-span latency percentiles and counters.
+
+    Finished spans are kept in a ring buffer and, when export_path is set,
+    appended there as OTLP JSON, one trace per line, once the trace's root
+    span ends. Spans that outlive their root (background memory work) are
+    written on their own line under the same trace id.
+    """
+
+    def __init__(self, enabled: bool = True, export_path: str | None = None, buffer_size: int = 2000, reservoir_size: int = 1000):
+        self.enabled = enabled
+        self.export_path = export_path
+        self.reservoir_size = reservoir_size
+        self.spans: deque[Span] = deque(maxlen=buffer_size)
+        self.metrics: dict[str, _SpanMetrics] = {}
+        self.counters: dict[tuple[str, tuple], float] = {}
+        self._open_traces: dict[str, list[Span]] = {}
+        self._lock = threading.Lock()
+        self.callback_handler = TracingCallbackHandler(self)
+
+    def start(self, name: str, parent: Span | None = None, **attributes) -> Span:
+        span = Span(name, parent if parent is not None else _current_span.get(), attributes)
+        if span.parent_id is None and self.enabled:
+            # Children finishing while the root is open are exported with it
+            with self._lock:
+                self._open_traces[span.trace_id] = []
+        return span
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        span = self.start(name, **attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            # Cancellation and generator shutdown end the span without marking it failed
+            if isinstance(e, Exception):
+                span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            try:
+                _current_span.reset(token)
+            except ValueError:
+                # An async generator closed from another context; that context never saw the span
+                pass
+            self.finish(span)
+
+    def finish(self, span: Span, end_ns: int | None = None):
+        span.end_ns = end_ns or time.time_ns()
+        if not self.enabled:
+            return
+        with self._lock:
+            metrics = self.metrics.get(span.name)
+            if metrics is None:
+                metrics = self.metrics[span.name] = _SpanMetrics(self.reservoir_size)
+            metrics.observe(span.duration, span.error is not None)
+            self.spans.append(span)
+
+            if span.parent_id is None:
+                export = self._open_traces.pop(span.trace_id, []) + [span]
+            elif span.trace_id in self._open_traces:
+                self._open_traces[span.trace_id].append(span)
+                export = None
+            else:
+                export = [span]
+
+        if export and self.export_path:
+            with self._lock, open(self.export_path, "a") as file:
+                file.write(json.dumps(self.otlp(export)) + "\n")
+
+    def event(self, name: str, **attributes):
+        """Record an event on the current span, if there is one."""
+        span = _current_span.get()
+        if span is not None:
+            span.add_event(name, **attributes)
+
+    def count(self, name: str, value: float = 1, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def otlp(self, spans: list[Span]) -> dict:
+        """Spans as an OTLP/JSON ExportTraceServiceRequest."""
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": _otlp_attributes({"service.name": "linear-agent", "process.pid": os.getpid()})},
+                "scopeSpans": [{
+                    "scope": {"name": "linear-agent"},
+                    "spans": [
+                        {
+                            "traceId": span.trace_id,
+                            "spanId": span.span_id,
+                            "parentSpanId": span.parent_id or "",
+                            "name": span.name,
+                            "kind": 1,
+                            "startTimeUnixNano": str(span.start_ns),
+                            "endTimeUnixNano": str(span.end_ns),
+                            "attributes": _otlp_attributes(span.attributes),
+                            "events": [
+                                {"timeUnixNano": str(time_ns), "name": name, "attributes": _otlp_attributes(attributes)}
+                                for time_ns, name, attributes in span.events
+                            ],
+                            "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+                        }
+                        for span in spans
+                    ],
+                }],
+            }]
+        }
+
+    def recent(self, limit: int = 200) -> dict:
+        with self._lock:
+            spans = list(self.spans)[-limit:]
+        return self.otlp(spans)
+
+    def latency(self) -> dict:
+        """p50/p95/p99 and counts per span name, in milliseconds."""
+        with self._lock:
+            return {
+                name: {
+                    "count": metrics.count,
+                    "errors": metrics.errors,
+                    "mean_ms": round(metrics.total / metrics.count * 1000, 1),
+                    **{f"p{int(quantile * 100)}_ms": round(value * 1000, 1) for quantile, value in metrics.quantiles().items()},
+                }
+                for name, metrics in sorted(self.metrics.items())
+            }
+
+    def prometheus(self) -> str:
+        """Metrics in the Prometheus text exposition format."""
+        lines = [
+            "# HELP agent_span_duration_seconds Duration of graph nodes and external calls",
+            "# TYPE agent_span_duration_seconds histogram",
+        ]
+        with self._lock:
+            metrics = sorted(self.metrics.items())
+            counters = sorted(self.counters.items())
+        for name, span_metrics in metrics:
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, span_metrics.buckets):
+                cumulative += count
+                lines.append(f"agent_span_duration_seconds_bucket{{span=\"{_label(name)}\",le=\"{bound}\"}} {cumulative}")
+            lines.append(f"agent_span_duration_seconds_bucket{{span=\"{_label(name)}\",le=\"+Inf\"}} {span_metrics.count}")
+            lines.append(f"agent_span_duration_seconds_sum{{span=\"{_label(name)}\"}} {span_metrics.total}")
+            lines.append(f"agent_span_duration_seconds_count{{span=\"{_label(name)}\"}} {span_metrics.count}")
+
+        lines += [
+            "# HELP agent_span_latency_seconds Recent latency quantiles of graph nodes and external calls",
+            "# TYPE agent_span_latency_seconds summary",
+        ]
+        for name, span_metrics in metrics:
+            for quantile, value in span_metrics.quantiles().items():
+                lines.append(f"agent_span_latency_seconds{{span=\"{_label(name)}\",quantile=\"{quantile}\"}} {value}")
+            lines.append(f"agent_span_latency_seconds_sum{{span=\"{_label(name)}\"}} {span_metrics.total}")
+            lines.append(f"agent_span_latency_seconds_count{{span=\"{_label(name)}\"}} {span_metrics.count}")
+
+        lines += ["# HELP agent_span_errors_total Spans that ended with an error", "# TYPE agent_span_errors_total counter"]
+        lines += [f"agent_span_errors_total{{span=\"{_label(name)}\"}} {span_metrics.errors}" for name, span_metrics in metrics]
+
+        typed = set()
+        for (name, labels), value in counters:
+            metric = f"agent_{name}_total"
+            if metric not in typed:
+                lines.append(f"# TYPE {metric} counter")
+                typed.add(metric)
+            label_text = ",".join(f"{key}=\"{_label(label)}\"" for key, label in labels)
+            lines.append(f"{metric}{{{label_text}}} {value}" if label_text else f"{metric} {value}")
+        return "\n".join(lines) + "\n"
+
+
+class TracingCallbackHandler(BaseCallbackHandler):
+    """Records each chat model call as an llm.generate span with its token usage."""
+
+    # Runs on the caller's loop rather than in an executor, so the enclosing span is still current
+    run_inline = True
+
+    def __init__(self, tracer: Tracer):
+        self.tracer = tracer
+        self._runs: dict[UUID, Span] = {}
+
+    def on_chat_model_start(self, serialized: dict, messages: list, *, run_id: UUID, **kwargs):
+        model = (kwargs.get("invocation_params") or {}).get("model") or (serialized or {}).get("name")
+        self._runs[run_id] = self.tracer.start("llm.generate", model=model, messages=sum(len(batch) for batch in messages))
+
+    def on_llm_end(self, response, *, run_id: UUID, **kwargs):
+        span = self._runs.pop(run_id, None)
+        if span is None:
+            return
+        usage = {}
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or usage
+        tokens_in, tokens_out = usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+        span.set(tokens_in=tokens_in, tokens_out=tokens_out)
+        self.tracer.count("llm_tokens", tokens_in, direction="in")
+        self.tracer.count("llm_tokens", tokens_out, direction="out")
+        self.tracer.finish(span)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs):
+        span = self._runs.pop(run_id, None)
+        if span is not None:
+            span.error = f"{type(error).__name__}: {error}"
+            self.tracer.finish(span)
+
+
+def traced(name: str, func):
+    """Wrap an async function (like a graph node) in a span."""
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        with get_tracer().span(name):
+            return await func(*args, **kwargs)
+    return wrapper
+
+
+def _build_tracer() -> Tracer:
+    return Tracer(
+        enabled=os.getenv("TRACING", "true").lower() == "true",
+        export_path=os.getenv("TRACE_EXPORT_PATH") or None,
+    )
+
+
+def get_tracer() -> Tracer:
+    return get_registry().get("tracer", _build_tracer)
@@ -0,0 +1,185 @@
+"""
+Linear Agent - HTTP and WebSocket API for the LangGraph agent.
+
+Serves the same graph as the Streamlit app to other frontends (Slack bots,
+web clients). Conversations are either sent whole with each request or kept
+in the SQLite checkpointer under a thread id, so any number of them run
+concurrently on one event loop, and the server scales out with worker
+processes. Clients are built once per process at startup.
+"""
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from typing import Literal
+
+from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel
+
+from src.graph.streaming import astream_reply
+from src.graph.utils.chains import get_llm
+from src.graph.utils.context import get_context_window
+from src.graph.utils.helpers import convert_messages_to_langchain_format
+from src.graph.utils.intent_classifier import get_intent_classifier
+from src.modules.linear import webhooks
+from src.modules.linear.linear import get_linear_client
+from src.modules.linear.scheduler import get_scheduler
+from src.modules.memory.memory_service import get_memory_manager
+from src.modules.resources.background import get_background_worker
+from src.modules.resources.resources import get_registry
+from src.modules.resources.tracing import get_tracer
+
+# Turns beyond this wait for a slot, so a burst can't exhaust the Linear and LLM budgets at once
+MAX_CONCURRENT_TURNS = int(os.getenv("SERVER_MAX_CONCURRENT_TURNS", 64))
+
+
+class ChatMessage(BaseModel):
+    role: Literal["user", "assistant"]
+    content: str
+
+
+class ChatRequest(BaseModel):
+    messages: list[ChatMessage]
+    # With a thread id earlier turns come from the checkpoint, so send only the new message
+    thread_id: str | None = None
+    # Memories are stored and recalled per user; without one the shared default namespace is used
+    user_id: str | None = None
+
+
+class ChatResponse(BaseModel):
+    content: str
+    params: dict | None = None
+
+
+def _warm_up():
+    # Build the shared clients before the first request instead of during it
+    get_llm()
+    get_linear_client()
+    get_memory_manager()
+    get_background_worker()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    _warm_up()
+    app.state.turns = asyncio.Semaphore(MAX_CONCURRENT_TURNS)
+    async with webhooks.lifespan(app):
+        yield
+    # Let memory extraction started by the last turns finish before clients close
+    await get_background_worker().adrain()
+    await get_registry().ashutdown()
+
+
+app = FastAPI(title="Linear Agent", lifespan=lifespan)
+app.include_router(webhooks.router)
+
+
+async def _aevents(request: ChatRequest):
+    if not request.messages or request.messages[-1].role != "user":
+        raise HTTPException(status_code=422, detail="The last message must come from the user")
+    async with app.state.turns:
+        messages = convert_messages_to_langchain_format([message.model_dump() for message in request.messages])
+        async for event in astream_reply(messages, request.thread_id, request.user_id):
+            yield event
+
+
+def _to_response(message) -> ChatResponse:
+    if message is None or not message.content:
+        return ChatResponse(content="No response from the graph.")
+    return ChatResponse(content=message.content, params=getattr(message, "params", None))
+
+
+@app.get("/health")
+async def health():
+    return {"status": "ok"}
+
+
+@app.get("/stats")
+async def stats():
+    intent_classifier = get_intent_classifier()
+    return {
+        "pid": os.getpid(),
+        "resources": get_registry().names(),
+        "background": get_background_worker().stats(),
+        "linear_rate_limit": get_scheduler().stats(),
+        "linear_cache": {
+            "metadata": get_linear_client().metadata_cache.stats(),
+            "responses": get_linear_client().response_cache.stats(),
+        },
+        "fast_router": intent_classifier.stats() if intent_classifier is not None else None,
+        "context_tokens": get_context_window().stats(),
+        "memory": get_memory_manager().stats(),
+        "latency": get_tracer().latency(),
+    }
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Span latency histograms and quantiles plus counters, for Prometheus to scrape."""
+    return get_tracer().prometheus()
+
+
+@app.get("/traces")
+async def traces(limit: int = 200):
+    """The most recent spans as OTLP/JSON."""
+    return get_tracer().recent(limit)
+
+
+@app.post("/chat", response_model=ChatResponse)
+async def chat(request: ChatRequest):
+    message = None
+    async for event in _aevents(request):
+        if event["type"] == "message":
+            message = event["message"]
+    return _to_response(message)
+
+
+@app.websocket("/ws/chat")
+async def chat_socket(websocket: WebSocket):
+    """
+    Each client frame is a ChatRequest. The reply streams back as
+    {"type": "delta", "text"} and {"type": "reset"} frames, then one
+    {"type": "message", "content", "params"} frame. A frame that can't be
+    parsed, or a turn that fails, gets a {"type": "error", "error"} frame
+    instead (dropping any partial reply); the connection stays open.
+    """
+    await websocket.accept()
+    try:
+        while True:
+            try:
+                request = ChatRequest.model_validate(await websocket.receive_json())
+            except ValueError as e:
+                # Malformed JSON, or a body that isn't a ChatRequest
+                await websocket.send_json({"type": "error", "error": f"Invalid request: {e}"})
+                continue
+            except KeyError:
+                # Starlette reads a binary frame's missing "text" key
+                await websocket.send_json({"type": "error", "error": "Invalid request: frames must be JSON text"})
+                continue
+
+            try:
+                async for event in _aevents(request):
+                    if event["type"] == "message":
+                        await websocket.send_json({"type": "message", **_to_response(event["message"]).model_dump()})
+                    else:
+                        await websocket.send_json(event)
+            except HTTPException as e:
+                await websocket.send_json({"type": "error", "error": str(e.detail)})
+            except WebSocketDisconnect:
+                raise
+            except Exception as e:
+                print(f"Error in websocket turn: {type(e).__name__}: {e}")
+                await websocket.send_json({"type": "error", "error": "The reply could not be generated. Please try again."})
+    except WebSocketDisconnect:
+        pass
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(
+        "src.server:app",
+        host=os.getenv("SERVER_HOST", "0.0.0.0"),
+        port=int(os.getenv("SERVER_PORT", 8000)),
+        workers=int(os.getenv("SERVER_WORKERS", 1)),
+    )
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# The app is run from the repository root and imported as src.*; tests do the same
+sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -0,0 +1,101 @@
+"""
+Local stand-in for the Linear GraphQL API, serving a workspace recorded in
+tests/fixtures/linear/workspace.json. Answers the queries the mirror sync and
+the issue listings send, paginated like Linear, and records every request.
+
+Run it on its own and point LINEAR_API_URL at it to try the agent offline:
+
+    python tests/linear_stub.py [port]
+"""
+import json
+import re
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+WORKSPACE_PATH = Path(__file__).parent / "fixtures" / "linear" / "workspace.json"
+
+
+def _page(nodes: list[dict], variables: dict) -> dict:
+    start = int(variables.get("after") or 0)
+    end = start + variables.get("first", 50)
+    return {"nodes": nodes[start:end], "pageInfo": {"hasNextPage": end < len(nodes), "endCursor": str(end)}}
+
+
+def _matches(issue: dict, issue_filter: dict) -> bool:
+    if "id" in issue_filter and issue["id"] not in issue_filter["id"]["in"]:
+        return False
+    if "team" in issue_filter and (issue.get("team") or {}).get("id") != issue_filter["team"]["id"]["eq"]:
+        return False
+    if "state" in issue_filter and (issue.get("state") or {}).get("name") != issue_filter["state"]["name"]["eq"]:
+        return False
+    if "assignee" in issue_filter and (issue.get("assignee") or {}).get("id") != issue_filter["assignee"]["id"]["eq"]:
+        return False
+    if "updatedAt" in issue_filter and issue["updatedAt"] <= issue_filter["updatedAt"]["gt"]:
+        return False
+    return True
+
+
+class LinearStub:
+    def __init__(self, workspace: dict | None = None):
+        self.workspace = workspace or json.loads(WORKSPACE_PATH.read_text())
+        self.requests: list[dict] = []
+        self._server: ThreadingHTTPServer | None = None
+
+    def operations(self) -> list[str]:
+        return [re.match(r"\s*(?:query|mutation)\s+(\w+)", request["query"]).group(1) for request in self.requests]
+
+    def respond(self, query: str, variables: dict) -> dict:
+        operation = re.match(r"\s*(?:query|mutation)\s+(\w+)", query).group(1)
+        if operation == "GetTeamId":
+            return {"data": {"teams": {"nodes": self.workspace["teams"]}}}
+        if operation == "GetTeamStates":
+            return {"data": {"team": {"states": {"nodes": self.workspace["states"].get(variables["teamId"], [])}}}}
+        if operation == "GetUsers":
+            return {"data": {"users": _page(self.workspace["users"], variables)}}
+        if operation == "GetUserByEmail":
+            users = [user for user in self.workspace["users"] if user["email"].lower() == variables["email"].lower()]
+            return {"data": {"users": {"nodes": [{"id": user["id"]} for user in users]}}}
+        if operation == "Issues":
+            issues = [
+                issue for issue in self.workspace["issues"]
+                if _matches(issue, variables.get("filter") or {})
+                and (variables.get("includeArchived") or not (issue.get("archivedAt") or issue.get("trashed")))
+            ]
+            return {"data": {"issues": _page(issues, variables)}}
+        return {"errors": [{"message": f"Unsupported operation {operation}"}]}
+
+    def start(self, port: int = 0) -> str:
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                stub.requests.append(body)
+                response = json.dumps(stub.respond(body["query"], body.get("variables") or {})).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(response)))
+                self.end_headers()
+                self.wfile.write(response)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return f"http://127.0.0.1:{self._server.server_address[1]}/graphql"
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+
+if __name__ == "__main__":
+    url = LinearStub().start(int(sys.argv[1]) if len(sys.argv) > 1 else 8002)
+    print(f"Linear stub listening on {url}")
+    threading.Event().wait()
@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from src.graph import nodes
+from src.graph.utils.prompts import GET_CURRENT_ISSUES_PROMPT
+from src.graph.utils.structured_outputs import GetCurrentIssuesResponse
+from src.modules.linear.linear import TicketStatus
+from src.modules.resources.resources import get_registry
+
+
+class StatusFromHistory:
+    """Stands in for the extraction chain: picks the status the conversation last mentioned."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def ainvoke(self, inputs: dict) -> GetCurrentIssuesResponse:
+        self.calls += 1
+        text = " ".join(message.content for message in inputs["messages"]).lower()
+        status = TicketStatus.DONE if "done" in text else TicketStatus.IN_PROGRESS if "in progress" in text else TicketStatus.TODO
+        return GetCurrentIssuesResponse(status=status, message=f"Here are the {status.value} issues.")
+
+
+@pytest.fixture
+def chain(monkeypatch):
+    monkeypatch.setenv("EXTRACTION_CACHE", "true")
+    monkeypatch.setenv("EXTRACTION_CACHE_EMBEDDINGS", "false")
+    chain = StatusFromHistory()
+    monkeypatch.setattr(nodes, "create_function_chain", lambda *_: chain)
+    yield chain
+    get_registry().shutdown()
+
+
+def extract(messages: list) -> GetCurrentIssuesResponse:
+    state = {"messages": messages, "summary": None, "route_payload": None, "deadline": None}
+    return asyncio.run(nodes._extract_arguments(state, GET_CURRENT_ISSUES_PROMPT, GetCurrentIssuesResponse, cache_route="get_current_issues"))
+
+
+def test_follow_up_is_not_served_from_another_conversation(chain):
+    done = extract([HumanMessage("list the done tickets"), AIMessage("Here you go."), HumanMessage("show them again")])
+    in_progress = extract([HumanMessage("what is in progress?"), AIMessage("Here you go."), HumanMessage("show them again")])
+
+    assert done.status == TicketStatus.DONE
+    assert in_progress.status == TicketStatus.IN_PROGRESS
+    assert in_progress.message == "Here are the In Progress issues."
+    assert chain.calls == 2
+
+
+def test_repeat_after_the_same_turns_is_served_from_the_cache(chain):
+    history = [HumanMessage("list the done tickets"), AIMessage("Here you go.")]
+
+    first = extract(history + [HumanMessage("show them again")])
+    second = extract(history + [HumanMessage("Show them again?")])
+
+    assert second == first
+    assert chain.calls == 1
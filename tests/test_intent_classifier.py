@@ -0,0 +1,32 @@
+import pytest
+
+from src.graph.utils.intent_classifier import IntentClassifier
+
+
+@pytest.mark.parametrize("message, route", [
+    ("create a task for john@x.com to fix the tickets page", "create_task"),
+    ("please create a ticket: bob@acme.com should review the onboarding tasks", "create_task"),
+    ("create a task to fix the login bug on the signup page", "create_task"),
+    ("what is alex@example.com working on?", "get_user_issues"),
+    ("show issues assigned to maria@example.com", "get_user_issues"),
+    ("show my todo tickets", "get_current_issues"),
+    ("what's in progress right now?", "get_current_issues"),
+    ("hey there!", "fallback"),
+])
+def test_unambiguous_messages_take_the_fast_path(message, route):
+    prediction = IntentClassifier().classify_rules(message)
+
+    assert prediction is not None
+    assert prediction.next_node == route
+
+
+@pytest.mark.parametrize("message", [
+    # Names someone without an email; listing the team's tickets would be wrong
+    "list tickets assigned to John",
+    "show the todo tickets for Maria",
+    # Asks for a listing and a new ticket at once
+    "list the issues with the deploy pipeline and create a task for it",
+    "create a task to fix the login bug and show me the open tickets",
+])
+def test_ambiguous_messages_are_left_to_the_llm(message):
+    assert IntentClassifier().classify_rules(message) is None
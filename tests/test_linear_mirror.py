@@ -0,0 +1,215 @@
+import asyncio
+import hashlib
+import hmac
+import json
+import time
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from linear_stub import LinearStub
+from src.modules.linear import webhooks
+from src.modules.linear.linear import Linear, MetadataCache, TTLCache, TicketStatus
+from src.modules.linear.mirror import IssueMirror
+from src.modules.linear.scheduler import RateLimitScheduler
+from src.modules.linear.transport import LinearTransport, TransportConfig
+
+FIXTURES = Path(__file__).parent / "fixtures" / "linear"
+SECRET = "test-webhook-secret"
+
+
+def load_payload(name: str, fresh: bool = True) -> dict:
+    payload = json.loads((FIXTURES / f"{name}.json").read_text())
+    if fresh:
+        # Recorded deliveries carry their original timestamp, which is long past the replay window
+        payload["webhookTimestamp"] = int(time.time() * 1000)
+    return payload
+
+
+def sign(body: bytes, secret: str = SECRET) -> str:
+    return hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+@pytest.fixture
+def mirror(tmp_path):
+    mirror = IssueMirror(str(tmp_path / "mirror.sqlite"))
+    yield mirror
+    mirror.close()
+
+
+@pytest.fixture
+def client(mirror, monkeypatch):
+    monkeypatch.setenv("LINEAR_WEBHOOK_SECRET", SECRET)
+    monkeypatch.setattr(webhooks, "get_mirror", lambda: mirror)
+    app = FastAPI()
+    app.include_router(webhooks.router)
+    return TestClient(app)
+
+
+@pytest.fixture
+def stub():
+    stub = LinearStub()
+    stub.url = stub.start()
+    yield stub
+    stub.stop()
+
+
+def deliver(client: TestClient, payload: dict, signature: str | None = None):
+    body = json.dumps(payload).encode()
+    headers = {"Content-Type": "application/json", "Linear-Signature": signature if signature is not None else sign(body)}
+    return client.post("/webhooks/linear", content=body, headers=headers)
+
+
+def mirrored_issue(mirror: IssueMirror, issue_id: str) -> dict | None:
+    row = mirror._connection.execute("SELECT payload FROM issues WHERE id = ?", (issue_id,)).fetchone()
+    return json.loads(row["payload"]) if row else None
+
+
+def test_signed_delivery_is_applied(client, mirror):
+    response = deliver(client, load_payload("webhook_issue_create"))
+
+    assert response.status_code == 200
+    assert mirrored_issue(mirror, "issue-4")["title"] == "Add audit log export"
+
+
+def test_bad_signature_is_rejected(client, mirror):
+    response = deliver(client, load_payload("webhook_issue_create"), signature=sign(b"something else"))
+
+    assert response.status_code == 401
+    assert mirrored_issue(mirror, "issue-4") is None
+
+
+def test_missing_signature_is_rejected(client, mirror):
+    body = json.dumps(load_payload("webhook_issue_create")).encode()
+    response = client.post("/webhooks/linear", content=body)
+
+    assert response.status_code == 401
+    assert mirrored_issue(mirror, "issue-4") is None
+
+
+def test_replayed_delivery_is_rejected(client, mirror):
+    # Correctly signed, but stamped when it was recorded
+    response = deliver(client, load_payload("webhook_issue_create", fresh=False))
+
+    assert response.status_code == 401
+    assert mirrored_issue(mirror, "issue-4") is None
+
+
+def test_delivery_without_timestamp_is_rejected(client, mirror):
+    payload = load_payload("webhook_issue_create")
+    del payload["webhookTimestamp"]
+
+    assert deliver(client, payload).status_code == 401
+    assert mirrored_issue(mirror, "issue-4") is None
+
+
+def test_deliveries_are_refused_without_a_secret(client, mirror, monkeypatch):
+    monkeypatch.delenv("LINEAR_WEBHOOK_SECRET")
+    payload = load_payload("webhook_issue_create")
+    body = json.dumps(payload).encode()
+
+    response = client.post("/webhooks/linear", content=body, headers={"Linear-Signature": sign(body, "")})
+
+    assert response.status_code == 503
+    assert mirrored_issue(mirror, "issue-4") is None
+
+
+def test_update_and_remove_follow_create(client, mirror):
+    mirror.upsert_users([{"id": "user-ana", "name": "Ana Ruiz", "email": "ana@example.com"}])
+
+    deliver(client, load_payload("webhook_issue_create"))
+    deliver(client, load_payload("webhook_issue_update"))
+    issue = mirrored_issue(mirror, "issue-4")
+    assert issue["state"]["name"] == "In Progress"
+    # Fields the update didn't carry survive, and the assignee's email is filled in from the users table
+    assert issue["description"] == "CSV export for admins"
+    assert issue["assignee"]["email"] == "ana@example.com"
+
+    deliver(client, load_payload("webhook_issue_remove"))
+    assert mirrored_issue(mirror, "issue-4") is None
+
+
+def test_null_assignee_id_unassigns_the_issue(client, mirror):
+    deliver(client, load_payload("webhook_issue_create"))
+    update = load_payload("webhook_issue_update")
+    del update["data"]["assignee"]
+    update["data"]["assigneeId"] = None
+    deliver(client, update)
+
+    assert mirrored_issue(mirror, "issue-4")["assignee"] is None
+    assert mirror._connection.execute("SELECT assignee_id FROM issues WHERE id = 'issue-4'").fetchone()[0] is None
+
+
+def test_out_of_order_update_does_not_overwrite_newer_state(client, mirror):
+    deliver(client, load_payload("webhook_issue_update"))
+    deliver(client, load_payload("webhook_issue_create"))
+
+    assert mirrored_issue(mirror, "issue-4")["state"]["name"] == "In Progress"
+
+
+def make_linear(stub: LinearStub, mirror: IssueMirror, monkeypatch) -> Linear:
+    monkeypatch.setenv("LINEAR_API_KEY", "test-key")
+    monkeypatch.setenv("LINEAR_TEAM_NAME", "Engineering")
+    return Linear(
+        transport=LinearTransport(TransportConfig(url=stub.url)),
+        metadata_cache=MetadataCache(),
+        response_cache=TTLCache(),
+        scheduler=RateLimitScheduler(),
+        mirror=mirror,
+    )
+
+
+def test_reconcile_then_listings_are_served_locally(stub, mirror, monkeypatch):
+    linear = make_linear(stub, mirror, monkeypatch)
+
+    async def run():
+        await mirror.areconcile(linear)
+        synced = len(stub.requests)
+        todo = await linear.aget_team_tickets(TicketStatus.TODO)
+        bens = await linear.aget_user_issues("ben@example.com")
+        await linear.transport.aclose()
+        return synced, todo, bens
+
+    synced, todo, bens = asyncio.run(run())
+
+    assert mirror.is_fresh()
+    assert mirror.stats()["issues"] == 3
+    assert sorted(ticket.title for ticket in todo) == ["Fix login redirect", "Rotate API keys"]
+    assert [ticket.title for ticket in bens] == ["Ship billing page"]
+    assert len(stub.requests) == synced
+
+
+def test_incremental_reconcile_only_pulls_newer_issues(stub, mirror, monkeypatch):
+    linear = make_linear(stub, mirror, monkeypatch)
+
+    async def run():
+        await mirror.areconcile(linear)
+        stub.requests.clear()
+        await mirror.areconcile(linear)
+        await linear.transport.aclose()
+
+    asyncio.run(run())
+
+    issue_filters = [request["variables"]["filter"] for request, operation in zip(stub.requests, stub.operations()) if operation == "Issues"]
+    assert issue_filters == [{"updatedAt": {"gt": "2024-05-04T08:30:00.000Z"}}]
+
+
+@pytest.mark.parametrize("removal", [{"archivedAt": "2024-05-06T09:00:00.000Z"}, {"trashed": True}])
+def test_reconcile_drops_issues_removed_while_webhooks_were_missed(stub, mirror, monkeypatch, removal):
+    linear = make_linear(stub, mirror, monkeypatch)
+
+    async def run():
+        await mirror.areconcile(linear)
+        issue = next(issue for issue in stub.workspace["issues"] if issue["id"] == "issue-1")
+        issue.update(removal, updatedAt="2024-05-06T09:00:00.000Z")
+        await mirror.areconcile(linear)
+        todo = await linear.aget_team_tickets(TicketStatus.TODO)
+        await linear.transport.aclose()
+        return todo
+
+    todo = asyncio.run(run())
+
+    assert mirrored_issue(mirror, "issue-1") is None
+    assert [ticket.title for ticket in todo] == ["Rotate API keys"]
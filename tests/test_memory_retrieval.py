@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+from langchain_core.embeddings import Embeddings
+
+from src.modules.memory.lexical import LexicalIndex
+from src.modules.memory.settings import MemorySettings
+from src.modules.resources.resources import get_registry
+
+MEMORIES = {
+    "food": "User's favorite food is pizza",
+    "dog": "User has a dog named Rex",
+    "email": "Ana's email is ana@example.com",
+}
+TOPICS = ["pizza", "rex", "ana"]
+
+
+class TopicEmbeddings(Embeddings):
+    """One dimension per topic, so only a text naming a memory's topic comes out close to it."""
+
+    def __init__(self):
+        self.queries = 0
+
+    def _embed(self, text: str) -> list[float]:
+        text = text.lower()
+        return [1.0 if topic in text else 0.0 for topic in TOPICS] + [0.1]
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        self.queries += 1
+        return self._embed(text)
+
+
+def build_index() -> LexicalIndex:
+    index = LexicalIndex()
+    index.add(list(MEMORIES), list(MEMORIES.values()), [{} for _ in MEMORIES])
+    return index
+
+
+def test_one_shared_word_does_not_cover_the_query():
+    threshold = MemorySettings().lexical_threshold
+
+    for query in ("what is my favorite color?", "quarterly budget for Rex project"):
+        hits = build_index().search(query, 3)
+        assert hits
+        assert max(coverage for _, _, coverage in hits) < threshold
+
+
+def test_memory_naming_every_query_term_is_fully_covered():
+    (document, _, coverage), *_ = build_index().search("ana@example.com", 3)
+
+    assert document.id == "email"
+    assert coverage == pytest.approx(1.0)
+
+
+@pytest.fixture
+def memory_service(tmp_path, monkeypatch):
+    monkeypatch.setenv("GOOGLE_API_KEY", "test-key")
+    monkeypatch.setenv("MEMORY_BACKEND", "local")
+    monkeypatch.setenv("MEMORY_LOCAL_PATH", str(tmp_path / "memory_index.sqlite"))
+    monkeypatch.setenv("EMBEDDING_CACHE_PATH", "")
+    monkeypatch.setenv("TRACING", "false")
+    from src.modules.memory.memory_service import MemoryService
+
+    service = MemoryService()
+    service.embeddings = TopicEmbeddings()
+    asyncio.run(service.backend.aadd(
+        "user-1",
+        list(MEMORIES),
+        service.embeddings.embed_documents(list(MEMORIES.values())),
+        list(MEMORIES.values()),
+        [{} for _ in MEMORIES],
+    ))
+    yield service
+    get_registry().shutdown()
+
+
+@pytest.mark.parametrize("message", ["what is my favorite color?", "quarterly budget for Rex project"])
+def test_shared_common_word_is_not_a_lexical_only_hit(memory_service, message):
+    asyncio.run(memory_service.get_relevant_memories(message, "user-1"))
+
+    assert memory_service.retrievals["lexical_only"] == 0
+    assert memory_service.embeddings.queries == 1
+
+
+def test_shared_common_word_does_not_return_an_unrelated_memory(memory_service):
+    memories = asyncio.run(memory_service.get_relevant_memories("what is my favorite color?", "user-1"))
+
+    assert memories is None or "pizza" not in memories
+
+
+def test_exact_keyword_match_skips_the_embedding(memory_service):
+    memories = asyncio.run(memory_service.get_relevant_memories("ana@example.com", "user-1"))
+
+    assert memories == "- Ana's email is ana@example.com"
+    assert memory_service.retrievals["lexical_only"] == 1
+    assert memory_service.embeddings.queries == 0